@@ -1,22 +1,115 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify, session, flash
-import os, subprocess, json, time, datetime, logging
+from flask import Flask, render_template, request, redirect, url_for, jsonify, session, flash, Response, g
+import os, re, subprocess, json, time, datetime, logging, threading, hashlib, hmac, tempfile, shutil, sqlite3, heapq, codecs, mmap, gzip, collections, queue, secrets, fcntl, bisect
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from functools import wraps
+from logging.handlers import RotatingFileHandler
+from urllib.parse import urlsplit
 
-# Configure logging
-logging.basicConfig(filename='dashboard.log', level=logging.INFO,
+# Configure logging (size-based rotation keeps dashboard.log bounded)
+logging.basicConfig(handlers=[RotatingFileHandler('dashboard.log', maxBytes=5 * 1024 * 1024, backupCount=3)],
+                    level=logging.INFO,
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
 app = Flask(__name__)
-app.secret_key = 'change-this-secret'  # Should be changed in production
 
 # Constants
 BASE_DIR = '/opt/lancache-tools/prefill'
 CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')
 LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
+DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dashboard.db')
+# 'json' keeps everything in config.json, 'sqlite' stores state in dashboard.db
+STORAGE_BACKEND = os.environ.get('DASHBOARD_STORAGE', 'json')
+# Seconds a prefill tool query result is served before it is refreshed in the background
+# (override with "tool_cache_ttl" in config.json)
+TOOL_CACHE_TTL = 300
+TOOL_COMMAND_TIMEOUT = 120
+# Attempts config_store.update() makes when another writer saved in between
+CONFIG_UPDATE_RETRIES = 5
+# Short-lived tool commands (queries, selection updates, logins) running at once;
+# read from "max_tool_processes" in config.json at startup
+MAX_TOOL_PROCESSES = 4
+# Seconds a login command may run, and how long a finished login result is kept for its page
+AUTH_TIMEOUT = 30
+AUTH_TASK_TTL = 600
+# Concurrent prefill jobs overall; per-platform limits come from "job_limits" in config.json (default 1)
+MAX_PREFILL_JOBS = 3
+JOB_HISTORY_SIZE = 50
+# Jobs that are waiting, applying their selection, or running
+ACTIVE_JOB_STATUSES = ('queued', 'starting', 'running')
+# Runs missed while the dashboard was down are started on boot if they are at most this old
+SCHEDULE_CATCHUP_HOURS = 6
+# How often the scheduler checks for schedules saved by another dashboard process
+SCHEDULER_POLL_SECONDS = 15
+# Delta prefills include games not prefilled for this many days ("delta_max_age_days" in config.json)
+DELTA_MAX_AGE_DAYS = 7
+# Log catalog, job metrics, lancache statistics and library snapshots
+HISTORY_DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'history.db')
+LOG_LIST_PAGE_SIZE = 25
+# Log retention defaults, overridable per key with "log_retention" in config.json (0 disables a limit)
+LOG_RETENTION = {
+    'compress_after_days': 1,
+    'max_age_days': 90,
+    'max_files_per_platform': 500,
+    'max_total_mb': 2048
+}
+LOG_RETENTION_INTERVAL = 3600
+# Log viewer page size, and the byte cap that keeps pages of very long lines bounded
+LOG_PAGE_LINES = 500
+LOG_PAGE_MAX_LINES = 5000
+LOG_PAGE_MAX_BYTES = 1024 * 1024
+# Live log streaming: read size and poll interval
+LOG_STREAM_CHUNK = 64 * 1024
+LOG_STREAM_POLL = 0.5
+# Games per page on the game selection page
+LIBRARY_PAGE_SIZE = 100
+# Recent library changes listed on a platform's games page
+LIBRARY_CHANGES_SHOWN = 50
+# How often a running job's log is parsed for progress
+PROGRESS_POLL_INTERVAL = 2
+# Lancache access log ("lancache_access_log" in config.json), read every ACCESS_LOG_INTERVAL
+# seconds into hourly per-depot totals that are kept for ACCESS_LOG_RETENTION_DAYS
+ACCESS_LOG_FILE = '/data/logs/access.log'
+ACCESS_LOG_INTERVAL = 60
+ACCESS_LOG_BUCKET_SECONDS = 3600
+ACCESS_LOG_RETENTION_DAYS = 30
+ACCESS_LOG_BATCH_KEYS = 5000
+# Lancache cache identifiers of the platforms the dashboard prefills
+CACHE_PLATFORMS = {'steam': 'steam', 'epicgames': 'epic', 'blizzard': 'battlenet'}
+# Lancache cache directory ("lancache_cache_dir" in config.json), rescanned every CACHE_SCAN_INTERVAL
+# seconds; usage samples are kept CACHE_USAGE_HISTORY_DAYS and growth is projected from the last
+# CACHE_GROWTH_DAYS. Set "lancache_cache_size_gb" to lancache's CACHE_DISK_SIZE if it is below the volume size.
+CACHE_DIR = '/data/cache/cache'
+CACHE_SCAN_INTERVAL = 300
+CACHE_USAGE_HISTORY_DAYS = 30
+CACHE_GROWTH_DAYS = 7
+CACHE_MTIME_GRANULARITY_NS = 2 * 10 ** 9
+# Live dashboard events: resumable history. Event and log streams share a lifetime before the
+# browser reconnects, and a budget of open streams ("stream_max_clients"; each holds a server thread)
+EVENT_HISTORY_SIZE = 200
+STREAM_MAX_SECONDS = 300
+STREAM_MAX_CLIENTS = 4
+
+# Production server (waitress) request threads and port ("server_threads" / "server_port" in config.json)
+SERVER_THREADS = 8
+SERVER_PORT = 8080
+# Session signing key generated on first start (or DASHBOARD_SECRET_KEY, shared by all instances)
+SECRET_KEY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'secret_key')
+# PBKDF2-SHA256 rounds for the dashboard password, and password checks allowed to run at once
+PASSWORD_KDF_ITERATIONS = 600000
+PASSWORD_KDF_CONCURRENCY = 2
+# Login attempts per client IP: a burst of LOGIN_BURST, then LOGIN_ATTEMPTS_PER_MINUTE
+LOGIN_BURST = 5
+LOGIN_ATTEMPTS_PER_MINUTE = 5
+LOGIN_BUCKETS_MAX = 10000
+# Held by the one dashboard process allowed to serve an installation
+SERVICE_LOCK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dashboard.lock')
+
+PLATFORMS = ['steam', 'epic', 'battlenet']
 
 # Default config
 DEFAULT_CONFIG = {
-    "password": "admin",  # Default password, should be changed
+    "password": "admin",  # Default password, hashed on first start; should be changed
     "games": {
         "steam": [],
         "epic": [],
@@ -33,29 +126,871 @@ DEFAULT_CONFIG = {
 # Ensure directories exist
 os.makedirs(LOG_DIR, exist_ok=True)
 
-# Load or create config
-def load_config():
-    if os.path.exists(CONFIG_FILE):
+def copy_config(config):
+    """Cheap structural copy of a config tree (dicts, lists and plain values only)"""
+    if isinstance(config, dict):
+        return {k: copy_config(v) for k, v in config.items()}
+    if isinstance(config, list):
+        return [copy_config(v) for v in config]
+    return config
+
+
+DAY_NUMBERS = {'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
+               'friday': 4, 'saturday': 5, 'sunday': 6}
+
+def next_schedule_run(schedule, now):
+    """Return the next datetime a weekly schedule fires at or after now, or None if invalid"""
+    day_num = DAY_NUMBERS.get(str(schedule.get('day', '')).lower(), -1)
+    if day_num < 0:
+        return None
+    try:
+        sched_time = datetime.datetime.strptime(schedule['time'], '%H:%M')
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    days_ahead = (day_num - now.weekday()) % 7
+    if days_ahead == 0 and now.strftime('%H:%M') > schedule['time']:
+        days_ahead = 7  # Next week
+    return now.replace(hour=sched_time.hour, minute=sched_time.minute, second=0, microsecond=0) + \
+        datetime.timedelta(days=days_ahead)
+
+
+_db_connections = threading.local()
+
+def connect_db(path):
+    """This thread's connection to a SQLite database in WAL mode, returning rows as sqlite3.Row"""
+    connections = getattr(_db_connections, 'connections', None)
+    if connections is None:
+        connections = _db_connections.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.row_factory = sqlite3.Row
+        connections[path] = conn
+    return conn
+
+
+class EventBus:
+    """In-process publish/subscribe feed of dashboard state changes.
+
+    Every event carries the full current state of its type (jobs, schedules,
+    config), serialized once when published and shared by all subscribers.
+    Recent events are kept so a reconnecting stream resumes from its last id;
+    a stream that is too far behind just gets the latest event of each type.
+    """
+
+    def __init__(self, history=EVENT_HISTORY_SIZE):
+        self._cond = threading.Condition()
+        self._events = collections.deque(maxlen=history)  # (id, type, json data)
+        self._latest = {}  # type -> newest event of that type
+        self._last_id = 0
+
+    def publish(self, event_type, data):
+        with self._cond:
+            self._last_id += 1
+            event = (self._last_id, event_type, json.dumps(data, default=str))
+            self._events.append(event)
+            self._latest[event_type] = event
+            self._cond.notify_all()
+
+    def since(self, last_id, timeout):
+        """Return (events after last_id, new last id), waiting up to timeout if there are none.
+
+        A last_id of 0 (a new stream) gets the latest event of each type.
+        """
+        with self._cond:
+            if last_id > self._last_id:
+                # An id from before a restart
+                last_id = 0
+            if last_id == self._last_id:
+                self._cond.wait(timeout)
+            if last_id == 0 or not self._events or self._events[0][0] > last_id + 1:
+                events = sorted(e for e in self._latest.values() if e[0] > last_id)
+            else:
+                events = [e for e in self._events if e[0] > last_id]
+            return events, self._last_id
+
+
+event_bus = EventBus()
+
+
+class MetricsRegistry:
+    """Counters, histograms and scrape-time gauges, rendered in the Prometheus text format.
+
+    An observation is one dict update (plus a bisect for histograms) under a
+    single lock; cumulative buckets and the text output are only built when
+    /metrics is scraped. Label values must come from small, fixed sets.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta = {}      # name -> (type, help, buckets or None)
+        self._values = {}    # name -> {label items: value or [bucket counts, sum, count]}
+        self._gauges = {}    # name -> callable returning {label items: value}
+
+    def counter(self, name, help_text):
+        self._meta[name] = ('counter', help_text, None)
+        self._values[name] = {}
+
+    def histogram(self, name, help_text, buckets):
+        self._meta[name] = ('histogram', help_text, tuple(buckets))
+        self._values[name] = {}
+
+    def gauge(self, name, help_text, collect):
+        self._meta[name] = ('gauge', help_text, None)
+        self._gauges[name] = collect
+
+    def inc(self, name, value=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._values[name]
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = tuple(sorted(labels.items()))
+        buckets = self._meta[name][2]
+        with self._lock:
+            series = self._values[name]
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            state[0][bisect.bisect_left(buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    @staticmethod
+    def _labels(items, extra=()):
+        items = tuple(items) + tuple(extra)
+        if not items:
+            return ''
+        escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in items)
+        return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + '}'
+
+    def render(self):
+        with self._lock:
+            values = {name: {key: (copy_config(v) if isinstance(v, list) else v) for key, v in series.items()}
+                      for name, series in self._values.items()}
+        lines = []
+        for name, (kind, help_text, buckets) in self._meta.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == 'gauge':
+                try:
+                    series = self._gauges[name]()
+                except Exception as e:
+                    logging.error(f"Error collecting metric {name}: {str(e)}")
+                    continue
+                for key, value in series.items():
+                    lines.append(f"{name}{self._labels(key)} {value}")
+            elif kind == 'counter':
+                for key, value in values[name].items():
+                    lines.append(f"{name}{self._labels(key)} {value}")
+            else:
+                for key, (counts, total, count) in values[name].items():
+                    cumulative = 0
+                    for bound, bucket_count in zip(buckets + (float('inf'),), counts):
+                        cumulative += bucket_count
+                        le = '+Inf' if bound == float('inf') else repr(float(bound))
+                        lines.append(f"{name}_bucket{self._labels(key, (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{self._labels(key)} {total}")
+                    lines.append(f"{name}_count{self._labels(key)} {count}")
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+metrics.histogram('dashboard_request_duration_seconds', 'Time to handle a request, by endpoint',
+                  (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+metrics.histogram('dashboard_tool_command_duration_seconds', 'Run time of prefill tool commands',
+                  (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120))
+metrics.counter('dashboard_tool_commands_total', 'Prefill tool commands by exit code (or timeout/cancelled)')
+metrics.counter('dashboard_config_reads_total', 'Config loads from disk')
+metrics.counter('dashboard_config_read_bytes_total', 'Bytes of config.json read')
+metrics.counter('dashboard_config_writes_total', 'Config writes to disk')
+metrics.counter('dashboard_config_write_bytes_total', 'Bytes of config.json written')
+metrics.histogram('dashboard_config_write_duration_seconds', 'Time to write the config',
+                  (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1))
+metrics.counter('dashboard_tool_cache_requests_total', 'Tool query cache lookups by result (hit, stale, miss, wait)')
+metrics.counter('dashboard_prefill_jobs_total', 'Finished prefill jobs by platform, kind and status')
+metrics.histogram('dashboard_prefill_job_duration_seconds', 'Run time of finished prefill jobs',
+                  (60, 300, 900, 1800, 3600, 7200, 14400, 28800, 86400))
+metrics.counter('dashboard_prefill_bytes_total', 'Bytes downloaded by prefill jobs')
+metrics.counter('dashboard_login_attempts_total', 'Login and API token attempts by result')
+metrics.counter('dashboard_access_log_lines_total', 'Lancache access log lines read, parsed or skipped')
+metrics.counter('dashboard_cache_scan_dirs_total', 'Cache directories listed again or skipped as unchanged by usage scans')
+
+
+class ConfigConflict(Exception):
+    """Raised when a config is saved on top of a newer revision than the one it was loaded from"""
+
+
+class ConfigStore:
+    """Keeps the parsed config in memory and revalidates it with a single stat of config.json.
+
+    Saves are atomic (temp file + rename), skipped when the serialized content
+    is unchanged, and coalesced into one write while a batch is open.
+
+    Every saved config carries a "revision" counter. A save based on an older
+    revision raises ConfigConflict, and update() retries its change on the
+    latest config. Writers hold an fcntl lock on <store>.lock so processes
+    take turns; readers never take it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._config = None
+        self._stamp = None
+        self._digest = None
+        self._indexes = {}
+        self._file_lock = threading.Lock()
+        self._file_lock_holds = 0
+        self._lock_fd = None
+
+    def _current_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _read(self):
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        metrics.inc('dashboard_config_reads_total')
+        metrics.inc('dashboard_config_read_bytes_total', len(data))
+        self._digest = hashlib.sha256(data).hexdigest()
         try:
-            with open(CONFIG_FILE, 'r') as f:
-                return json.load(f)
+            return json.loads(data)
         except json.JSONDecodeError:
-            logging.error(f"Invalid JSON in {CONFIG_FILE}")
-            return DEFAULT_CONFIG
-    else:
-        save_config(DEFAULT_CONFIG)
-        return DEFAULT_CONFIG
+            logging.error(f"Invalid JSON in {self.path}")
+            return copy_config(DEFAULT_CONFIG)
+
+    def _set_config(self, config):
+        self._config = config
+        self._indexes = {}
+
+    def view(self):
+        """Return the shared parsed config. Callers must treat it as read-only"""
+        stamp = self._current_stamp()
+        config = self._config
+        if config is not None and stamp is not None and stamp == self._stamp:
+            return config
+        with self._lock:
+            stamp = self._current_stamp()
+            if self._config is not None and stamp is not None and stamp == self._stamp:
+                return self._config
+            if stamp is None:
+                self._set_config(dict(copy_config(DEFAULT_CONFIG), revision=1))
+                self._flush()
+                return self._config
+            self._set_config(self._read())
+            self._stamp = stamp
+            return self._config
+
+    def copy(self):
+        """Return a private copy of the config that the caller may mutate and save"""
+        return copy_config(self.view())
+
+    def revision(self):
+        return self.view().get('revision', 0)
+
+    def _hold_file_lock(self):
+        # Taken before self._lock, so readers never wait on another process
+        with self._file_lock:
+            if self._file_lock_holds == 0:
+                if self._lock_fd is None:
+                    self._lock_fd = os.open(self.path + '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            self._file_lock_holds += 1
+
+    def _release_file_lock(self):
+        with self._file_lock:
+            self._file_lock_holds -= 1
+            if self._file_lock_holds == 0:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _writing(self):
+        """Hold the cross-process write lock and the in-process lock"""
+        self._hold_file_lock()
+        try:
+            with self._lock:
+                yield
+        finally:
+            self._release_file_lock()
+
+    @staticmethod
+    def _content(config):
+        return {k: v for k, v in config.items() if k != 'revision'}
+
+    def _publish(self, old, new):
+        event_bus.publish('config', {
+            'revision': new.get('revision'),
+            'game_counts': {platform: len(games) for platform, games in new['games'].items()}
+        })
+        if old.get('schedules') != new.get('schedules'):
+            event_bus.publish('schedules', {'upcoming': get_upcoming_schedules(new['schedules'])})
+
+    def game_index(self, platform):
+        """Return {game id: game} for a platform, built once per config revision"""
+        config = self.view()
+        index = self._indexes.get(platform)
+        if index is None or index[0] is not config:
+            index = (config, {g['id']: g for g in config['games'].get(platform, [])})
+            self._indexes[platform] = index
+        return index[1]
+
+    def save(self, config):
+        """Replace the config; the write is deferred to the end of an open batch.
+
+        Raises ConfigConflict if the config was loaded at an older revision.
+        On success the caller's config is moved to the new revision, so it can
+        be changed and saved again.
+        """
+        batched = getattr(self._local, 'depth', 0) > 0
+        with self._writing():
+            current = self.view()
+            revision = current.get('revision', 0)
+            if config.get('revision', revision) != revision:
+                raise ConfigConflict(f"Config was loaded at revision {config['revision']}, now at {revision}")
+            if self._content(config) == self._content(current):
+                return
+            config['revision'] = revision + 1
+            self._set_config(copy_config(config))
+            self._publish(current, self._config)
+            if not batched:
+                self._flush()
+            elif not getattr(self._local, 'dirty', False):
+                # Other processes wait to write until this batch is flushed
+                self._hold_file_lock()
+                self._local.dirty = True
+
+    def update(self, mutate, retries=CONFIG_UPDATE_RETRIES):
+        """Apply mutate(config) to a copy of the latest config and save it, retrying on conflict.
+
+        Returns whatever mutate returns. mutate may run more than once, so it
+        should only change the config it is given. After retries optimistic
+        attempts the change is made while holding the write lock.
+        """
+        for attempt in range(retries):
+            config = self.copy()
+            result = mutate(config)
+            try:
+                self.save(config)
+                return result
+            except ConfigConflict:
+                logging.info(f"Config changed during update, retrying ({attempt + 1}/{retries})")
+        with self._writing():
+            config = self.copy()
+            result = mutate(config)
+            self.save(config)
+            return result
+
+    def update_games(self, platform, updates):
+        """Merge {game id: {field: value}} into the platform's games"""
+        def apply(config):
+            for game in config['games'].get(platform, []):
+                if game['id'] in updates:
+                    game.update(updates[game['id']])
+        self.update(apply)
+
+    def upcoming_schedules(self, limit=5):
+        return get_upcoming_schedules(self.view()['schedules'])[:limit]
+
+    def begin(self):
+        self._local.depth = getattr(self._local, 'depth', 0) + 1
+
+    def end(self):
+        self._local.depth = max(getattr(self._local, 'depth', 0) - 1, 0)
+        if self._local.depth == 0 and getattr(self._local, 'dirty', False):
+            self._local.dirty = False
+            try:
+                with self._lock:
+                    self._flush()
+            finally:
+                self._release_file_lock()
+
+    @contextmanager
+    def batch(self):
+        """Coalesce every save() and update() inside the block into a single write"""
+        self.begin()
+        try:
+            yield self
+        finally:
+            self.end()
+
+    def _flush(self):
+        data = json.dumps(self._config, indent=4).encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        if digest == self._digest and self._current_stamp() == self._stamp:
+            return False
+
+        started = time.perf_counter()
+        # Write next to the target so the rename stays on one filesystem
+        fd, tmp_path = tempfile.mkstemp(prefix='.config-', suffix='.tmp',
+                                        dir=os.path.dirname(self.path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.exists(self.path):
+                shutil.copymode(self.path, tmp_path)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._stamp = self._current_stamp()
+        self._digest = digest
+        metrics.inc('dashboard_config_writes_total')
+        metrics.inc('dashboard_config_write_bytes_total', len(data))
+        metrics.observe('dashboard_config_write_duration_seconds', time.perf_counter() - started)
+        return True
+
+
+class SqliteConfigStore(ConfigStore):
+    """ConfigStore backed by SQLite, with games and schedules stored as indexed rows.
+
+    The in-memory view is revalidated against a revision counter that every
+    write bumps, and saves only touch the rows that actually changed.
+    """
+
+    GAME_FIELDS = ('id', 'name', 'added', 'last_prefilled')
+    SCHEDULE_FIELDS = ('id', 'platform', 'day', 'time', 'enabled')
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._persisted = None
+        with self._lock:
+            self._create_schema()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _create_schema(self):
+        self._connect().executescript('''
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS games (
+                platform TEXT NOT NULL,
+                game_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                name TEXT,
+                added TEXT,
+                last_prefilled TEXT,
+                extra TEXT,
+                PRIMARY KEY (platform, game_id)
+            );
+            CREATE TABLE IF NOT EXISTS schedules (
+                id TEXT PRIMARY KEY,
+                position INTEGER NOT NULL,
+                platform TEXT,
+                day TEXT,
+                time TEXT,
+                enabled INTEGER,
+                next_run TEXT,
+                extra TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_schedules_next_run ON schedules (enabled, next_run);
+            INSERT OR IGNORE INTO meta (key, value) VALUES ('revision', 0);
+        ''')
+
+    def _current_stamp(self):
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return row[0] if row and row[0] else None
+
+    def _read(self):
+        metrics.inc('dashboard_config_reads_total')
+        conn = self._connect()
+        config = {key: json.loads(value) for key, value in conn.execute('SELECT key, value FROM settings')}
+        config['games'] = {platform: [] for platform in config.get('games_platforms', DEFAULT_CONFIG['games'])}
+        config.pop('games_platforms', None)
+        for row in conn.execute('SELECT platform, game_id, name, added, last_prefilled, extra '
+                                'FROM games ORDER BY platform, position'):
+            game = self._row_to_record(self.GAME_FIELDS, row[1:5], row[5])
+            config['games'].setdefault(row[0], []).append(game)
+        config['schedules'] = [
+            self._row_to_record(self.SCHEDULE_FIELDS, row[:4] + (bool(row[4]),), row[5])
+            for row in conn.execute('SELECT id, platform, day, time, enabled, extra '
+                                    'FROM schedules ORDER BY position')
+        ]
+        config['revision'] = self._current_stamp() or 0
+        self._persisted = copy_config(config)
+        return config
+
+    @staticmethod
+    def _row_to_record(fields, values, extra):
+        record = dict(zip(fields, values))
+        if extra:
+            record.update(json.loads(extra))
+        return record
+
+    @staticmethod
+    def _extra(record, fields):
+        extra = {k: v for k, v in record.items() if k not in fields}
+        return json.dumps(extra) if extra else None
+
+    def _flush(self):
+        config = self._config
+        old = self._persisted or {'games': {}, 'schedules': []}
+        if self._content(config) == self._content(old):
+            return False
+
+        started = time.perf_counter()
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            settings = {k: v for k, v in config.items() if k not in ('games', 'schedules', 'revision')}
+            settings['games_platforms'] = list(config['games'])
+            conn.execute('DELETE FROM settings')
+            conn.executemany('INSERT INTO settings (key, value) VALUES (?, ?)',
+                             [(k, json.dumps(v)) for k, v in settings.items()])
+
+            for platform, games in config['games'].items():
+                old_games = old['games'].get(platform, [])
+                if games == old_games:
+                    continue
+                old_index = {g['id']: (pos, g) for pos, g in enumerate(old_games)}
+                keep = set()
+                rows = []
+                for pos, game in enumerate(games):
+                    keep.add(game['id'])
+                    if old_index.get(game['id']) == (pos, game):
+                        continue
+                    rows.append((platform, game['id'], pos, game.get('name'), game.get('added'),
+                                 game.get('last_prefilled'), self._extra(game, self.GAME_FIELDS)))
+                conn.executemany('INSERT OR REPLACE INTO games (platform, game_id, position, name, added, '
+                                 'last_prefilled, extra) VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+                conn.executemany('DELETE FROM games WHERE platform = ? AND game_id = ?',
+                                 [(platform, gid) for gid in old_index if gid not in keep])
+            for platform in old['games']:
+                if platform not in config['games']:
+                    conn.execute('DELETE FROM games WHERE platform = ?', (platform,))
+
+            if config['schedules'] != old['schedules']:
+                now = datetime.datetime.now()
+                conn.execute('DELETE FROM schedules')
+                conn.executemany(
+                    'INSERT INTO schedules (id, position, platform, day, time, enabled, next_run, extra) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    [(s['id'], pos, s.get('platform'), s.get('day'), s.get('time'), int(bool(s.get('enabled'))),
+                      self._next_run_text(s, now), self._extra(s, self.SCHEDULE_FIELDS))
+                     for pos, s in enumerate(config['schedules'])])
+
+            self._set_revision(conn, config['revision'])
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self._persisted = copy_config(config)
+        metrics.inc('dashboard_config_writes_total')
+        metrics.observe('dashboard_config_write_duration_seconds', time.perf_counter() - started)
+        return True
+
+    @staticmethod
+    def _next_run_text(schedule, now):
+        next_run = next_schedule_run(schedule, now)
+        return next_run.strftime('%Y-%m-%d %H:%M') if next_run else None
+
+    def _set_revision(self, conn, revision):
+        conn.execute("UPDATE meta SET value = ? WHERE key = 'revision'", (revision,))
+        self._stamp = revision
+
+    def update_games(self, platform, updates):
+        """Merge {game id: {field: value}} into the platform's games as row updates"""
+        with self._writing():
+            config = self.view()
+            if getattr(self._local, 'dirty', False):
+                # Unflushed changes in this batch must land before the row updates
+                self._flush()
+            games = [dict(g, **updates[g['id']]) if g['id'] in updates else g
+                     for g in config['games'].get(platform, [])]
+            rows = [(g.get('name'), g.get('added'), g.get('last_prefilled'),
+                     self._extra(g, self.GAME_FIELDS), platform, g['id'])
+                    for g in games if g['id'] in updates]
+            if not rows:
+                return
+            revision = config.get('revision', 0) + 1
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.executemany('UPDATE games SET name = ?, added = ?, last_prefilled = ?, extra = ? '
+                                 'WHERE platform = ? AND game_id = ?', rows)
+                self._set_revision(conn, revision)
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            metrics.inc('dashboard_config_writes_total')
+            config = dict(config, games=dict(config['games'], **{platform: games}), revision=revision)
+            self._set_config(config)
+            self._publish(config, config)
+            self._persisted = copy_config(config)
+
+    def upcoming_schedules(self, limit=5):
+        """Enabled schedules ordered by their stored next run, using the next_run index"""
+        self.view()
+        conn = self._connect()
+        now = datetime.datetime.now()
+        overdue = conn.execute('SELECT id, day, time FROM schedules WHERE enabled = 1 AND next_run < ?',
+                               (now.strftime('%Y-%m-%d %H:%M'),)).fetchall()
+        if overdue:
+            # Roll passed runs forward; this does not change the config, so no revision bump
+            conn.executemany('UPDATE schedules SET next_run = ? WHERE id = ?',
+                             [(self._next_run_text({'day': r[1], 'time': r[2]}, now), r[0]) for r in overdue])
+        rows = conn.execute(
+            'SELECT id, platform, next_run FROM schedules WHERE enabled = 1 AND next_run IS NOT NULL '
+            'ORDER BY next_run LIMIT ?', (limit,))
+        return [{'id': r[0], 'platform': r[1], 'next_run': r[2]} for r in rows]
+
+
+def migrate_json_to_sqlite(json_path, store):
+    """One-shot import of config.json into an empty SQLite store"""
+    if store._current_stamp() is not None or not os.path.exists(json_path):
+        return False
+    with open(json_path, 'r') as f:
+        config = json.load(f)
+    # The JSON file's revision counter does not carry over
+    config.pop('revision', None)
+    store.save(config)
+    logging.info(f"Migrated {json_path} into {store.path}")
+    return True
+
+
+def create_config_store():
+    if STORAGE_BACKEND == 'sqlite':
+        store = SqliteConfigStore(DB_FILE)
+        migrate_json_to_sqlite(CONFIG_FILE, store)
+        return store
+    return ConfigStore(CONFIG_FILE)
+
+
+config_store = create_config_store()
+
+
+def load_secret_key():
+    """Session signing key: DASHBOARD_SECRET_KEY, else one generated once per install and kept in SECRET_KEY_FILE"""
+    key = os.environ.get('DASHBOARD_SECRET_KEY')
+    if key:
+        return key
+    try:
+        # O_EXCL makes the first of several starting workers create it; the rest read it
+        fd = os.open(SECRET_KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        for _ in range(50):
+            with open(SECRET_KEY_FILE) as f:
+                key = f.read().strip()
+            if key:
+                return key
+            time.sleep(0.1)
+        raise RuntimeError(f"{SECRET_KEY_FILE} is empty; delete it to generate a new key")
+    key = secrets.token_hex(32)
+    with os.fdopen(fd, 'w') as f:
+        f.write(key + '\n')
+    logging.info(f"Generated a new session secret key in {SECRET_KEY_FILE}")
+    return key
+
+
+app.secret_key = load_secret_key()
+app.config.update(SESSION_COOKIE_HTTPONLY=True, SESSION_COOKIE_SAMESITE='Lax')
+
+
+class AuthManager:
+    """Dashboard password, login rate limiting and API tokens.
+
+    The password is stored as a PBKDF2 hash. Once a login succeeds, a keyed
+    hash of the password is kept in memory, so later attempts (right or wrong)
+    are checked without the KDF; before that, at most PASSWORD_KDF_CONCURRENCY
+    KDF runs happen at once. Login attempts draw from a token bucket per client
+    IP, and rejected ones never touch the config or the disk. API tokens are
+    random, so they are stored as plain SHA-256 hashes and looked up by dict.
+    """
+
+    PREFIX = 'pbkdf2_sha256'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = collections.OrderedDict()  # ip -> [tokens, last refill]
+        self._kdf_slots = threading.BoundedSemaphore(PASSWORD_KDF_CONCURRENCY)
+        self._memo_key = secrets.token_bytes(32)   # never leaves this process
+        self._verified = None                       # (stored hash, keyed hash of the password)
+        self._marker = None                         # (stored hash, session marker)
+        self._tokens = (None, {})                   # (config revision, {token hash: token})
+
+    # Passwords
+
+    @classmethod
+    def hash_password(cls, password, iterations=None):
+        iterations = iterations or PASSWORD_KDF_ITERATIONS
+        salt = secrets.token_bytes(16)
+        digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+        return f"{cls.PREFIX}${iterations}${salt.hex()}${digest.hex()}"
+
+    def _memo(self, password):
+        return hmac.new(self._memo_key, password.encode(), hashlib.sha256).digest()
+
+    def verify_password(self, password):
+        stored = config_store.view().get('password', '')
+        verified = self._verified
+        if verified and verified[0] == stored:
+            return hmac.compare_digest(verified[1], self._memo(password))
+        if stored and not stored.startswith(self.PREFIX + '$'):
+            # A plaintext password written to config.json while running; hashed on first use
+            if not hmac.compare_digest(stored.encode(), password.encode()):
+                return False
+            def apply(config):
+                if config.get('password') == stored:
+                    config['password'] = self.hash_password(password)
+            config_store.update(apply)
+            logging.info("Stored the new dashboard password as a hash")
+            return True
+        try:
+            prefix, iterations, salt, digest = stored.split('$')
+            iterations = int(iterations)
+            salt, digest = bytes.fromhex(salt), bytes.fromhex(digest)
+        except ValueError:
+            logging.error("Stored dashboard password is not a valid hash; set a new plaintext password in config.json")
+            return False
+        if prefix != self.PREFIX:
+            return False
+        with self._kdf_slots:
+            ok = hmac.compare_digest(hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations), digest)
+        if ok:
+            self._verified = (stored, self._memo(password))
+        return ok
+
+    def set_password(self, password):
+        config_store.update(lambda config: config.update(password=self.hash_password(password)))
+
+    def migrate(self):
+        """Replace a plaintext password in the config (such as the default) with its hash"""
+        def apply(config):
+            if not config.get('password', '').startswith(self.PREFIX + '$'):
+                config['password'] = self.hash_password(config.get('password', ''))
+                return True
+        if config_store.update(apply):
+            logging.info("Stored the dashboard password as a hash")
 
-def save_config(config):
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(config, f, indent=4)
+    def session_marker(self):
+        """Changes with the password, so a password change signs out every other session"""
+        stored = config_store.view().get('password', '')
+        marker = self._marker
+        if marker is None or marker[0] != stored:
+            marker = self._marker = (stored, hmac.new(app.secret_key.encode(), stored.encode(),
+                                                      hashlib.sha256).hexdigest()[:16])
+        return marker[1]
+
+    # Rate limiting
+
+    def throttle(self, ip):
+        """Take a login attempt from the client's bucket; returns 0, or seconds to wait when it is empty"""
+        rate = LOGIN_ATTEMPTS_PER_MINUTE / 60.0
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.pop(ip, None) or [float(LOGIN_BURST), now]
+            bucket[0] = min(LOGIN_BURST, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            self._buckets[ip] = bucket
+            while len(self._buckets) > LOGIN_BUCKETS_MAX:
+                self._buckets.popitem(last=False)
+            if bucket[0] < 1:
+                return int((1 - bucket[0]) / rate) + 1
+            bucket[0] -= 1
+            return 0
+
+    # API tokens
+
+    @staticmethod
+    def _token_hash(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def request_token(self):
+        """The API token entry for the request's "Authorization: Bearer" header, or None"""
+        header = request.headers.get('Authorization', '')
+        if not header.startswith('Bearer '):
+            return None
+        return self.token_for(header[7:].strip())
+
+    def token_for(self, token):
+        """The API token entry for a bearer token, or None"""
+        revision = config_store.revision()
+        if self._tokens[0] != revision:
+            self._tokens = (revision, {t['hash']: t for t in config_store.view().get('api_tokens', [])})
+        return self._tokens[1].get(self._token_hash(token))
+
+    def create_token(self, name):
+        """Store a new API token and return it; only its hash is kept"""
+        token = secrets.token_urlsafe(32)
+        entry = {
+            'id': secrets.token_hex(4),
+            'name': name,
+            'hash': self._token_hash(token),
+            'created': datetime.datetime.now().isoformat()
+        }
+        config_store.update(lambda config: config.setdefault('api_tokens', []).append(entry))
+        return token
+
+    def revoke_token(self, token_id):
+        def apply(config):
+            tokens = config.get('api_tokens', [])
+            config['api_tokens'] = [t for t in tokens if t['id'] != token_id]
+            return len(config['api_tokens']) != len(tokens)
+        return config_store.update(apply)
+
+
+auth = AuthManager()
+auth.migrate()
+
+# Every request is one batch, so several config_store.update() or save() calls cost a single write
+@app.before_request
+def begin_config_batch():
+    config_store.begin()
+
+@app.teardown_request
+def end_config_batch(exc):
+    config_store.end()
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_duration(response):
+    started = g.get('request_started')
+    if started is not None:
+        metrics.observe('dashboard_request_duration_seconds', time.perf_counter() - started,
+                        endpoint=request.endpoint or 'unknown', method=request.method,
+                        status=f"{response.status_code // 100}xx")
+    return response
 
 # Login required decorator
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'logged_in' not in session:
-            return redirect(url_for('login', next=request.url))
+        if request.path.startswith('/api/') and 'Authorization' in request.headers:
+            token = auth.request_token()
+            if token is None:
+                # Guessing tokens draws from the same per-IP bucket as logins
+                retry_after = auth.throttle(request.remote_addr)
+                metrics.inc('dashboard_login_attempts_total', result='throttled' if retry_after else 'bad_token')
+                if retry_after:
+                    return jsonify({'error': 'Too many attempts'}), 429, {'Retry-After': str(retry_after)}
+                return jsonify({'error': 'Invalid API token'}), 401
+            g.api_token = token['name']
+            return f(*args, **kwargs)
+        if not session.get('logged_in') or session.get('auth') != auth.session_marker():
+            if request.path.startswith('/api/'):
+                return jsonify({'error': 'Authentication required'}), 401
+            return redirect(url_for('login', next=request.full_path.rstrip('?')))
         return f(*args, **kwargs)
     return decorated_function
 
@@ -63,7 +998,7 @@ def login_required(f):
 @app.route('/')
 @login_required
 def dashboard():
-    config = load_config()
+    config = config_store.view()
     # Count games by platform
     game_counts = {
         'steam': len(config['games']['steam']),
@@ -76,35 +1011,53 @@ def dashboard():
     active_jobs = get_active_jobs()
     
     # Get upcoming schedules
-    upcoming = get_upcoming_schedules(config['schedules'])
+    upcoming = config_store.upcoming_schedules()
     
     return render_template('dashboard.html', 
                           game_counts=game_counts, 
                           total_games=total_games,
                           active_jobs=active_jobs,
-                          upcoming=upcoming)
+                          upcoming=upcoming,
+                          top_apps=job_metrics.top_apps(),
+                          cache_stats=access_log.summary(),
+                          storage=cache_usage.forecast())
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
-        config = load_config()
-        if request.form.get('password') == config['password']:
+        retry_after = auth.throttle(request.remote_addr)
+        if retry_after:
+            metrics.inc('dashboard_login_attempts_total', result='throttled')
+            flash(f"Too many login attempts. Try again in {retry_after} seconds.")
+            return render_template('login.html'), 429, {'Retry-After': str(retry_after)}
+        if auth.verify_password(request.form.get('password', '')):
+            metrics.inc('dashboard_login_attempts_total', result='success')
+            session.clear()
             session['logged_in'] = True
-            next_page = request.args.get('next')
-            return redirect(next_page or url_for('dashboard'))
+            session['auth'] = auth.session_marker()
+            next_page = request.args.get('next', '')
+            # Only paths on this dashboard, so the login page can't redirect elsewhere. Browsers drop
+            # tabs and newlines and read a backslash as "/", so check the URL the way they will see it.
+            next_page = re.sub(r'[\t\r\n]', '', next_page).replace('\\', '/')
+            target = urlsplit(next_page)
+            if not next_page.startswith('/') or next_page.startswith('//') or target.scheme or target.netloc:
+                next_page = url_for('dashboard')
+            return redirect(next_page)
         else:
+            metrics.inc('dashboard_login_attempts_total', result='failure')
+            logging.warning(f"Failed login from {request.remote_addr}")
             flash('Invalid password')
     return render_template('login.html')
 
 @app.route('/logout')
 def logout():
-    session.pop('logged_in', None)
+    session.clear()
     return redirect(url_for('login'))
 
 @app.route('/games')
 @login_required
 def games():
-    config = load_config()
+    config = config_store.view()
     return render_template('games.html', games=config['games'])
 
 @app.route('/games/<platform>', methods=['GET', 'POST'])
@@ -113,25 +1066,38 @@ def manage_games(platform):
     if platform not in ['steam', 'epic', 'battlenet']:
         return redirect(url_for('games'))
     
-    config = load_config()
-    
-    # Sync with the prefill tool's game selections
-    tool_games = get_tool_selected_games(platform)
-    if tool_games is not None:
-        # Update our dashboard's game list with the tool's selections
-        sync_tool_games_to_dashboard(platform, tool_games, config)
-    
-    if request.method == 'POST':
-        if 'refresh_games' in request.form:
-            # Force a refresh from the tool's selections
-            tool_games = get_tool_selected_games(platform)
+    # A delta job has narrowed the tool's selection, so the tool's games must not replace ours.
+    # One that ended with the previous dashboard process gets the full selection written back first.
+    if job_manager.selection_overridden(platform):
+        job_manager.restore_pending(platform)
+    overridden = job_manager.selection_overridden(platform)
+    if request.method == 'POST' and 'refresh_games' in request.form:
+        if overridden:
+            flash(f"A delta prefill holds a reduced {platform} selection in the prefill tool; "
+                  f"refresh the game list once it finishes.")
+        else:
+            # Force a refresh from the tool's selections, bypassing the cache
+            tool_games = get_tool_selected_games(platform, force=True)
             if tool_games is not None:
-                sync_tool_games_to_dashboard(platform, tool_games, config)
+                sync_tool_games_to_dashboard(platform, tool_games)
                 flash(f"Refreshed {platform} game selections from the prefill tool.")
             else:
                 flash(f"No games found or couldn't read selections from the {platform} prefill tool.")
+    elif not overridden:
+        # Sync with the prefill tool's game selections (served from cache when possible)
+        tool_games = get_tool_selected_games(platform)
+        if tool_games is not None:
+            # Update our dashboard's game list with the tool's selections
+            sync_tool_games_to_dashboard(platform, tool_games)
     
-    return render_template('manage_games.html', platform=platform, games=config['games'][platform])
+    games = config_store.view()['games'][platform]
+    # Library changes since the earliest last prefill cover every game's own comparison
+    prefilled = [g['last_prefilled'] for g in games if g.get('last_prefilled')]
+    changed = library_snapshots.changed_since(platform, min(prefilled)) if prefilled else {}
+    changed = {g['id']: changed[g['id']] for g in games
+               if g['id'] in changed and g.get('last_prefilled') and changed[g['id']] > g['last_prefilled']}
+    return render_template('manage_games.html', platform=platform, games=games, changed=changed,
+                          library_changes=library_snapshots.changes(platform, limit=LIBRARY_CHANGES_SHOWN))
 
 
 @app.route('/select_games/<platform>', methods=['GET', 'POST'])
@@ -141,58 +1107,502 @@ def select_games(platform):
     if platform not in ['steam', 'epic', 'battlenet']:
         return redirect(url_for('games'))
     
-    config = load_config()
-    
     # Check if authenticated
     if not is_authenticated(platform):
         flash(f"You need to authenticate with {platform.capitalize()} first")
         return redirect(url_for('authenticate', platform=platform))
     
-    # Get user's game library
-    library = get_user_game_library(platform)
-    
     # Get currently selected games (for checking selected status)
-    selected_games = {g['id']: g for g in config['games'][platform]}
+    selected_games = config_store.game_index(platform)
     
     if request.method == 'POST':
         if 'save_selection' in request.form:
-            # Get selected game IDs from form
-            selected_ids = request.form.getlist('game_ids')
+            library = get_user_game_library(platform)
             
-            # Create a list of selected games
-            selected = []
-            for game in library:
-                if game['id'] in selected_ids:
-                    # Use existing data if game was already selected
-                    if game['id'] in selected_games:
-                        selected.append(selected_games[game['id']])
-                    else:
-                        selected.append({
-                            'id': game['id'],
-                            'name': game['name'],
-                            'added': datetime.datetime.now().isoformat(),
-                            'last_prefilled': None
-                        })
+            # The page only shows a slice of the library, so it sends changes rather than the full
+            # selection: explicit add/remove lists, plus the checkboxes of the games it displayed
+            shown = set(request.form.getlist('page_ids'))
+            checked = set(request.form.getlist('game_ids'))
+            added = set(request.form.getlist('add_ids')) | checked
+            removed = (set(request.form.getlist('remove_ids')) | (shown - checked)) - added
             
-            # Update config
-            config['games'][platform] = selected
-            save_config(config)
+            def apply(config):
+                # Create a list of selected games
+                current = {g['id']: g for g in config['games'].get(platform, [])}
+                selected_ids = (set(current) | added) - removed
+                selected = []
+                for game in library:
+                    if game['id'] in selected_ids:
+                        # Use existing data if game was already selected
+                        if game['id'] in current:
+                            selected.append(current[game['id']])
+                        else:
+                            selected.append({
+                                'id': game['id'],
+                                'name': game['name'],
+                                'added': datetime.datetime.now().isoformat(),
+                                'last_prefilled': None
+                            })
+                config['games'][platform] = selected
+                return [g['id'] for g in selected]
             
-            # Write selections to prefill tool
-            update_tool_selections(platform, selected_ids)
+            # Update config
+            selected_ids = config_store.update(apply)
             
-            flash(f"Game selection saved successfully")
+            # Write selections to prefill tool, unless a delta job holds a subset there;
+            # the job writes the dashboard's selection back when it finishes
+            if job_manager.selection_overridden(platform):
+                flash(f"Game selection saved. It will be applied to the {platform} prefill tool "
+                      f"when the running delta prefill finishes.")
+            else:
+                update_tool_selections(platform, selected_ids)
+                flash(f"Game selection saved successfully")
             return redirect(url_for('manage_games', platform=platform))
     
     return render_template('select_games.html', 
                          platform=platform, 
-                         library=library,
-                         selected_games=selected_games)
+                         selected_count=len(selected_games),
+                         selected_ids=list(selected_games),
+                         storage=cache_usage.forecast(),
+                         **query_library(platform, request.args, selected_games))
+
+
+class ToolRunner:
+    """Bounded pool for short-lived prefill tool commands.
+
+    Commands are argument lists and never go through a shell. At most
+    max_workers processes run at once, further commands wait in the pool's
+    queue. Every command has a timeout after which its process group is
+    killed, and queued or running commands can be cancelled.
+    """
+
+    def __init__(self, max_workers):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tool')
+        self._lock = threading.Lock()
+        self._handles = {}   # future -> {'process': Popen or None, 'cancelled': bool}
+
+    def submit(self, cmd, timeout=TOOL_COMMAND_TIMEOUT, log_file=None, cleanup=()):
+        """Queue a command and return a Future for its CompletedProcess.
+
+        Output is captured, or written to log_file if given. Files in cleanup
+        are removed once the command has finished, whatever the outcome.
+        """
+        handle = {'process': None, 'cancelled': False}
+        future = self._executor.submit(self._run, [str(arg) for arg in cmd], timeout, log_file, list(cleanup), handle)
+        with self._lock:
+            self._handles[future] = handle
+        future.add_done_callback(self._forget)
+        return future
+
+    def run(self, cmd, timeout=TOOL_COMMAND_TIMEOUT, log_file=None, cleanup=()):
+        """Run a command through the pool and wait for it; raises subprocess.TimeoutExpired"""
+        return self.submit(cmd, timeout, log_file, cleanup).result()
+
+    def cancel(self, future):
+        """Drop a queued command or kill a running one"""
+        if future.cancel():
+            return True
+        with self._lock:
+            handle = self._handles.get(future)
+            if handle is None:
+                return False
+            handle['cancelled'] = True
+            process = handle['process']
+        if process is not None:
+            self._kill(process)
+        return True
+
+    def _forget(self, future):
+        with self._lock:
+            self._handles.pop(future, None)
+
+    def _kill(self, process):
+        try:
+            os.killpg(process.pid, 9)
+        except OSError:
+            pass
+
+    def _run(self, cmd, timeout, log_file, cleanup, handle):
+        logf = None
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            if log_file:
+                logf = open(log_file, 'w')
+            with self._lock:
+                if handle['cancelled']:
+                    outcome = 'cancelled'
+                    return subprocess.CompletedProcess(cmd, -9, '', '')
+                process = subprocess.Popen(
+                    cmd,
+                    stdin=subprocess.DEVNULL,
+                    stdout=logf or subprocess.PIPE,
+                    stderr=subprocess.STDOUT if logf else subprocess.PIPE,
+                    text=True,
+                    # Own process group so a timeout also kills the tool's children
+                    start_new_session=True
+                )
+                handle['process'] = process
+            try:
+                stdout, stderr = process.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                self._kill(process)
+                process.communicate()
+                outcome = 'timeout'
+                raise
+            outcome = 'cancelled' if handle['cancelled'] else str(process.returncode)
+            return subprocess.CompletedProcess(cmd, process.returncode, stdout or '', stderr or '')
+        finally:
+            tool = os.path.basename(cmd[0])
+            command = cmd[1] if len(cmd) > 1 else ''
+            metrics.observe('dashboard_tool_command_duration_seconds', time.perf_counter() - started,
+                            tool=tool, command=command)
+            metrics.inc('dashboard_tool_commands_total', tool=tool, command=command, exit_code=outcome)
+            if logf:
+                logf.close()
+            for path in cleanup:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+tool_runner = ToolRunner(config_store.view().get('max_tool_processes', MAX_TOOL_PROCESSES))
+
+
+class ToolQueryCache:
+    """Per-platform cache of prefill tool query results with stale-while-revalidate.
+
+    Fresh entries are served directly. Once an entry is older than the TTL it is
+    still served while a single background refresh runs; concurrent misses for
+    the same key share one tool invocation.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}   # (query, platform) -> (result, fetched_at)
+        self._inflight = {}  # (query, platform) -> threading.Event
+
+    def _ttl(self):
+        return config_store.view().get('tool_cache_ttl', TOOL_CACHE_TTL)
+
+    def get(self, key, fetch, force=False):
+        with self._lock:
+            if force:
+                self._entries.pop(key, None)
+            entry = self._entries.get(key)
+            if entry and time.monotonic() - entry[1] < self._ttl():
+                metrics.inc('dashboard_tool_cache_requests_total', query=key[0], result='hit')
+                return entry[0]
+
+            event = self._inflight.get(key)
+            if entry:
+                metrics.inc('dashboard_tool_cache_requests_total', query=key[0], result='stale')
+                if event is None:
+                    self._inflight[key] = threading.Event()
+                    threading.Thread(target=self._refresh, args=(key, fetch), daemon=True).start()
+                return entry[0]
+
+            if event is None:
+                self._inflight[key] = threading.Event()
+                owner = True
+            else:
+                owner = False
+            metrics.inc('dashboard_tool_cache_requests_total', query=key[0], result='miss' if owner else 'wait')
+
+        if owner:
+            return self._refresh(key, fetch)
+        event.wait(TOOL_COMMAND_TIMEOUT)
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def _refresh(self, key, fetch):
+        result = None
+        try:
+            result = fetch(key[1])
+        except Exception as e:
+            logging.error(f"Error refreshing {key[0]} for {key[1]}: {str(e)}")
+        with self._lock:
+            # Failed queries are not cached so the next request retries
+            if result is not None:
+                self._entries[key] = (result, time.monotonic())
+            self._inflight.pop(key).set()
+        return result
+
+    def peek(self, key):
+        """Return the cached result for a key, however old, without querying the tool"""
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def invalidate(self, platform):
+        with self._lock:
+            for key in [k for k in self._entries if k[1] == platform]:
+                del self._entries[key]
+
+
+tool_cache = ToolQueryCache()
+
+
+def get_tool_selected_games(platform, force=False):
+    """Read the selected games from the prefill tool, cached per platform"""
+    return tool_cache.get(('selected', platform), fetch_tool_selected_games, force=force)
+
 
+def get_user_game_library(platform, force=False):
+    """Get the user's game library for the specified platform, cached per platform"""
+    return tool_cache.get(('library', platform), fetch_library_snapshot, force=force) or []
 
-def get_tool_selected_games(platform):
+
+class LibraryIndex:
+    """Search index over one fetch of a platform's game library.
+
+    Lowercased names and the name and size orderings are computed once per
+    fetch. Substring matches are cached per query, and a query that extends
+    a cached one (as it does while typing) only searches the earlier matches.
+    """
+
+    SORTS = ('name', 'size')
+    MATCH_CACHE_SIZE = 64
+
+    def __init__(self, games):
+        self.games = games
+        self.version = time.monotonic_ns()
+        self._names = [str(g.get('name', '')).lower() for g in games]
+        by_name = sorted(range(len(games)), key=lambda i: (self._names[i], str(games[i]['id'])))
+        self._orders = {
+            'name': by_name,
+            # sorted() is stable, so games of equal size stay in name order
+            'size': sorted(by_name, key=lambda i: games[i].get('size') or 0)
+        }
+        self._matches = collections.OrderedDict()  # query -> set of positions
+        self._lock = threading.Lock()
+
+    def _match(self, query):
+        with self._lock:
+            if query in self._matches:
+                self._matches.move_to_end(query)
+                return self._matches[query]
+            base = next((self._matches[query[:n]] for n in range(len(query) - 1, 0, -1)
+                         if query[:n] in self._matches), None)
+        candidates = base if base is not None else range(len(self._names))
+        matches = {i for i in candidates if query in self._names[i]}
+        with self._lock:
+            self._matches[query] = matches
+            while len(self._matches) > self.MATCH_CACHE_SIZE:
+                self._matches.popitem(last=False)
+        return matches
+
+    def search(self, query='', sort='name', descending=False):
+        """Return the positions of the games whose name contains query, in the requested order"""
+        order = self._orders.get(sort, self._orders['name'])
+        if descending:
+            order = order[::-1]
+        query = query.strip().lower()
+        if not query:
+            return order
+        matches = self._match(query)
+        return [i for i in order if i in matches]
+
+
+_library_indexes = {}  # platform -> (library list, LibraryIndex)
+
+def library_index(platform):
+    """Return the search index for a platform's library, rebuilt when the library is fetched again"""
+    library = get_user_game_library(platform)
+    cached = _library_indexes.get(platform)
+    if cached is None or cached[0] is not library:
+        cached = (library, LibraryIndex(library))
+        _library_indexes[platform] = cached
+    return cached[1]
+
+
+def query_library(platform, args, selected):
+    """One page of a platform's library for the search, sort and page in request args"""
+    index = library_index(platform)
+    query = args.get('q', '')
+    sort = args.get('sort') if args.get('sort') in LibraryIndex.SORTS else 'name'
+    order = 'desc' if args.get('order') == 'desc' else 'asc'
+    positions = index.search(query, sort, order == 'desc')
+    pages = max((len(positions) + LIBRARY_PAGE_SIZE - 1) // LIBRARY_PAGE_SIZE, 1)
+    page = min(max(args.get('page', 1, type=int), 1), pages)
+    start = (page - 1) * LIBRARY_PAGE_SIZE
+    return {
+        'games': [dict(index.games[i], selected=index.games[i]['id'] in selected)
+                  for i in positions[start:start + LIBRARY_PAGE_SIZE]],
+        'q': query,
+        'sort': sort,
+        'order': order,
+        'page': page,
+        'pages': pages,
+        'total': len(positions),
+        'library_size': len(index.games)
+    }
+
+
+class LibrarySnapshots:
+    """Last seen game library per platform (id -> name, size, content hash), with diffs.
+
+    Each fetch of a library is compared with the previous one using set and
+    dict operations on the ids and hashes; an unchanged library is recognised
+    by its digest alone. Additions, removals and updates are recorded with a
+    timestamp, so changes can be listed later and compared with when games
+    were last prefilled. The first snapshot of a platform is only a baseline.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._snapshots = {}  # platform -> (digest, {id: (name, size, hash)})
+        self.revision = 0     # bumped whenever a library changes
+        connect_db(self.path).executescript('''
+            CREATE TABLE IF NOT EXISTS library_games (
+                platform TEXT NOT NULL,
+                game_id TEXT NOT NULL,
+                name TEXT,
+                size INTEGER,
+                hash TEXT NOT NULL,
+                changed TEXT NOT NULL,
+                PRIMARY KEY (platform, game_id)
+            );
+            CREATE TABLE IF NOT EXISTS library_state (
+                platform TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                taken TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS library_changes (
+                platform TEXT NOT NULL,
+                ts TEXT NOT NULL,
+                game_id TEXT NOT NULL,
+                name TEXT,
+                change TEXT NOT NULL,
+                old_size INTEGER,
+                new_size INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_library_changes_platform ON library_changes (platform, ts);
+        ''')
+
+    def _snapshot(self, platform):
+        snapshot = self._snapshots.get(platform)
+        if snapshot is None:
+            conn = connect_db(self.path)
+            state = conn.execute('SELECT digest FROM library_state WHERE platform = ?', (platform,)).fetchone()
+            games = {r['game_id']: (r['name'], r['size'], r['hash']) for r in conn.execute(
+                'SELECT game_id, name, size, hash FROM library_games WHERE platform = ?', (platform,))}
+            snapshot = self._snapshots[platform] = (state['digest'] if state else None, games)
+        return snapshot
+
+    @staticmethod
+    def _hash(game):
+        return hashlib.sha1(json.dumps(game, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+    def record(self, platform, games):
+        """Store a fetched library; returns its diff against the previous one, or None if unchanged"""
+        current = {str(g['id']): (g.get('name'), g.get('size') or 0, self._hash(g)) for g in games if g.get('id')}
+        digest = hashlib.sha1(''.join(sorted(i + h for i, (_, _, h) in current.items())).encode()).hexdigest()
+        with self._lock:
+            previous_digest, previous = self._snapshot(platform)
+            if digest == previous_digest:
+                return None
+            baseline = previous_digest is None
+            added = current.keys() - previous.keys()
+            removed = previous.keys() - current.keys()
+            updated = {i for i in current.keys() & previous.keys() if current[i][2] != previous[i][2]}
+            now = datetime.datetime.now().isoformat()
+            with connect_db(self.path) as conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO library_games (platform, game_id, name, size, hash, changed) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    # Games of the baseline have no change time
+                    [(platform, i) + current[i] + ('' if baseline else now,) for i in added | updated])
+                conn.executemany('DELETE FROM library_games WHERE platform = ? AND game_id = ?',
+                                 [(platform, i) for i in removed])
+                conn.execute('INSERT OR REPLACE INTO library_state (platform, digest, taken) VALUES (?, ?, ?)',
+                             (platform, digest, now))
+                if not baseline:
+                    conn.executemany(
+                        'INSERT INTO library_changes (platform, ts, game_id, name, change, old_size, new_size) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        [(platform, now, i, current[i][0], 'added', None, current[i][1]) for i in added] +
+                        [(platform, now, i, previous[i][0], 'removed', previous[i][1], None) for i in removed] +
+                        [(platform, now, i, current[i][0], 'updated', previous[i][1], current[i][1]) for i in updated])
+            self._snapshots[platform] = (digest, current)
+            self.revision += 1
+        diff = {
+            'baseline': baseline,
+            'added': sorted(added),
+            'removed': sorted(removed),
+            'updated': sorted(updated),
+            'size_changed': sorted(i for i in updated if current[i][1] != previous[i][1])
+        }
+        if not baseline:
+            logging.info(f"{platform} library changed: {len(added)} added, {len(removed)} removed, "
+                         f"{len(updated)} updated")
+        return diff
+
+    def sizes(self, platform):
+        """{game id: size in bytes} from the platform's last snapshot; 0 where the library gave no size"""
+        with self._lock:
+            return {game_id: size for game_id, (_, size, _) in self._snapshot(platform)[1].items()}
+
+    def changed_since(self, platform, since):
+        """Map of game ids that were added or updated after an ISO timestamp to when that happened"""
+        return {r['game_id']: r['changed'] for r in connect_db(self.path).execute(
+            'SELECT game_id, changed FROM library_games WHERE platform = ? AND changed > ?',
+            (platform, since or ''))}
+
+    def changes(self, platform, since=None, limit=100):
+        """Recorded library changes of a platform, newest first"""
+        return [dict(r) for r in connect_db(self.path).execute(
+            'SELECT ts, game_id, name, change, old_size, new_size FROM library_changes '
+            'WHERE platform = ? AND ts > ? ORDER BY ts DESC, name LIMIT ?', (platform, since or '', limit))]
+
+    def prune(self, before):
+        """Drop change records older than an ISO timestamp"""
+        with connect_db(self.path) as conn:
+            conn.execute('DELETE FROM library_changes WHERE ts < ?', (before,))
+
+
+library_snapshots = LibrarySnapshots(HISTORY_DB_FILE)
+
+
+def fetch_library_snapshot(platform):
+    """Query the tool for the library and diff it against the last snapshot"""
+    games = fetch_user_game_library(platform)
+    if games:
+        try:
+            diff = library_snapshots.record(platform, games)
+        except Exception as e:
+            logging.error(f"Error recording {platform} library snapshot: {str(e)}")
+            diff = None
+        if diff and diff['added'] and not diff['baseline'] and \
+                platform in config_store.view().get('auto_select_new_games', []):
+            auto_select_games(platform, {g['id']: g for g in games if g['id'] in set(diff['added'])})
+    return games
+
+
+def auto_select_games(platform, new_games):
+    """Add new library titles to a platform's selection, in the dashboard and the prefill tool"""
+    now = datetime.datetime.now().isoformat()
+
+    def apply(config):
+        selected = config['games'].setdefault(platform, [])
+        known = {g['id'] for g in selected}
+        for game_id, game in new_games.items():
+            if game_id not in known:
+                selected.append({'id': game_id, 'name': game['name'], 'added': now, 'last_prefilled': None})
+        return [g['id'] for g in selected]
+
+    selected_ids = config_store.update(apply)
+    logging.info(f"Auto-selected {len(new_games)} new {platform} games: "
+                 f"{', '.join(g['name'] for g in new_games.values())}")
+    # A running delta job writes the dashboard's selection back to the tool when it finishes
+    if not job_manager.selection_overridden(platform):
+        update_tool_selections(platform, selected_ids)
+
+
+def fetch_tool_selected_games(platform):
     """Read the selected games from the prefill tool's configuration"""
-    config = load_config()
+    config = config_store.view()
     tool_path = config['prefill_tools'][platform]
     
     # Check if tool exists
@@ -205,8 +1615,8 @@ def get_tool_selected_games(platform):
         # Let's use their CLI interfaces to get the data
         if platform == 'steam':
             # Run SteamPrefill status command to get selected games
-            cmd = f"{tool_path} select-apps status --json"
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+            cmd = [tool_path] + ['select-apps', 'status', '--json']
+            result = tool_runner.run(cmd)
             
             if result.returncode == 0 and result.stdout:
                 try:
@@ -227,8 +1637,8 @@ def get_tool_selected_games(platform):
             
         elif platform == 'epic':
             # Run EpicPrefill status command to get selected games
-            cmd = f"{tool_path} select-apps status --json"
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+            cmd = [tool_path] + ['select-apps', 'status', '--json']
+            result = tool_runner.run(cmd)
             
             if result.returncode == 0 and result.stdout:
                 try:
@@ -249,8 +1659,8 @@ def get_tool_selected_games(platform):
             
         elif platform == 'battlenet':
             # Run BattleNetPrefill status command to get selected games
-            cmd = f"{tool_path} select-apps status --json"
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+            cmd = [tool_path] + ['select-apps', 'status', '--json']
+            result = tool_runner.run(cmd)
             
             if result.returncode == 0 and result.stdout:
                 try:
@@ -275,7 +1685,7 @@ def get_tool_selected_games(platform):
     return None
 
 
-def sync_tool_games_to_dashboard(platform, tool_games, config):
+def sync_tool_games_to_dashboard(platform, tool_games):
     """Sync the games selected in the prefill tool to the dashboard config"""
     if not tool_games:
         return False
@@ -283,30 +1693,33 @@ def sync_tool_games_to_dashboard(platform, tool_games, config):
     # Get current timestamp
     now = datetime.datetime.now().isoformat()
     
-    # Keep track of existing games (for last_prefilled dates)
-    existing_games = {g['id']: g.get('last_prefilled') for g in config['games'][platform]}
-    
-    # Create new list with games from tool
-    new_games = []
-    for game in tool_games:
-        game_entry = {
-            'id': game['id'],
-            'name': game['name'],
-            'added': now,
-            'last_prefilled': existing_games.get(game['id'])
-        }
-        new_games.append(game_entry)
+    def apply(config):
+        # Keep track of existing games (for added and last_prefilled dates)
+        existing_games = {g['id']: g for g in config['games'].get(platform, [])}
+        
+        # Create new list with games from tool
+        new_games = []
+        for game in tool_games:
+            # Keep everything recorded about games that were already selected
+            existing = existing_games.get(game['id'], {})
+            game_entry = dict(existing, **{
+                'id': game['id'],
+                'name': game['name'],
+                'added': existing.get('added', now),
+                'last_prefilled': existing.get('last_prefilled')
+            })
+            new_games.append(game_entry)
+        config['games'][platform] = new_games
     
-    # Update config and save
-    config['games'][platform] = new_games
-    save_config(config)
+    # Applied to the latest config, so concurrent updates such as last_prefilled survive
+    config_store.update(apply)
     
     return True
 
 
-def get_user_game_library(platform):
-    """Get the user's game library for the specified platform"""
-    config = load_config()
+def fetch_user_game_library(platform):
+    """Query the prefill tool for the user's game library"""
+    config = config_store.view()
     tool_path = config['prefill_tools'][platform]
     
     # Check if tool exists
@@ -318,8 +1731,8 @@ def get_user_game_library(platform):
         # Use the library-list command of the prefill tool (if available)
         # Each platform's tool has different command structures
         if platform == 'steam':
-            cmd = f"{tool_path} library-list --json"
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+            cmd = [tool_path] + ['library-list', '--json']
+            result = tool_runner.run(cmd)
             
             if result.returncode == 0 and result.stdout:
                 try:
@@ -340,8 +1753,8 @@ def get_user_game_library(platform):
                     logging.error(f"Error parsing Steam JSON output")
             
         elif platform == 'epic':
-            cmd = f"{tool_path} library-list --json"
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+            cmd = [tool_path] + ['library-list', '--json']
+            result = tool_runner.run(cmd)
             
             if result.returncode == 0 and result.stdout:
                 try:
@@ -362,8 +1775,8 @@ def get_user_game_library(platform):
                     logging.error(f"Error parsing Epic JSON output")
             
         elif platform == 'battlenet':
-            cmd = f"{tool_path} library-list --json"
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+            cmd = [tool_path] + ['library-list', '--json']
+            result = tool_runner.run(cmd)
             
             if result.returncode == 0 and result.stdout:
                 try:
@@ -388,9 +1801,9 @@ def get_user_game_library(platform):
         logging.warning(f"Could not get game library for {platform}, using fallback method")
         
         # As a fallback, use select-apps list with a timeout
-        cmd = f"{tool_path} select-apps list --json"
+        cmd = [tool_path, 'select-apps', 'list', '--json']
         try:
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=10)
+            result = tool_runner.run(cmd, timeout=10)
             if result.returncode == 0 and result.stdout:
                 try:
                     data = json.loads(result.stdout)
@@ -409,7 +1822,7 @@ def get_user_game_library(platform):
 
 def update_tool_selections(platform, selected_ids):
     """Update the prefill tool's selections with the selected game IDs"""
-    config = load_config()
+    config = config_store.view()
     tool_path = config['prefill_tools'][platform]
     
     # Check if tool exists
@@ -418,25 +1831,23 @@ def update_tool_selections(platform, selected_ids):
         return False
     
     try:
-        # Create a temporary file with the selection list
-        selection_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), f'temp_{platform}_selection.json')
-        
         # Format depends on the tool's expected input
         selection_data = {
             'apps': selected_ids if platform == 'steam' else [],
             'games': selected_ids if platform in ['epic', 'battlenet'] else []
         }
         
-        with open(selection_file, 'w') as f:
+        # A private temporary file, so concurrent updates never share one
+        fd, selection_file = tempfile.mkstemp(prefix=f'{platform}_selection_', suffix='.json')
+        with os.fdopen(fd, 'w') as f:
             json.dump(selection_data, f)
         
-        # Update the tool's selections
-        cmd = f"{tool_path} select-apps update --file {selection_file}"
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+        # Update the tool's selections; the runner removes the file afterwards
+        cmd = [tool_path, 'select-apps', 'update', '--file', selection_file]
+        result = tool_runner.run(cmd, cleanup=[selection_file])
         
-        # Clean up the temporary file
-        if os.path.exists(selection_file):
-            os.remove(selection_file)
+        # The tool's selection changed, so the cached status is out of date
+        tool_cache.invalidate(platform)
         
         if result.returncode == 0:
             return True
@@ -501,6 +1912,65 @@ def is_authenticated(platform):
     return False
 
 
+# Login attempts running in the tool pool, keyed by a random task id
+auth_tasks = {}
+auth_tasks_lock = threading.Lock()
+
+
+def write_secret_file(lines):
+    """Write lines to a temporary file only the dashboard user can read, and return its path"""
+    fd, path = tempfile.mkstemp(prefix='prefill_auth_', suffix='.txt')
+    with os.fdopen(fd, 'w') as f:
+        f.write(''.join(f"{line}\n" for line in lines))
+    return path
+
+
+def submit_auth(platform, step, option, lines):
+    """Start a login command in the tool pool and return its task id"""
+    tool_path = config_store.view()['prefill_tools'][platform]
+    prefix = 'auth_mfa' if step == 'mfa' else 'auth'
+    log_file = os.path.join(LOG_DIR, f"{prefix}_{platform}_{int(time.time())}.log")
+    secret_file = write_secret_file(lines)
+    future = tool_runner.submit([tool_path, 'login', option, secret_file],
+                                timeout=AUTH_TIMEOUT, log_file=log_file, cleanup=[secret_file])
+    future.add_done_callback(lambda f: record_auth_log(log_file, f))
+
+    task_id = secrets.token_hex(16)
+    now = time.monotonic()
+    with auth_tasks_lock:
+        for old_id in [t for t, task in auth_tasks.items() if now - task['submitted'] > AUTH_TASK_TTL]:
+            tool_runner.cancel(auth_tasks.pop(old_id)['future'])
+        auth_tasks[task_id] = {
+            'platform': platform,
+            'step': step,
+            'future': future,
+            'log_file': log_file,
+            'submitted': now
+        }
+    return task_id
+
+
+def record_auth_log(log_file, future):
+    """Catalog a login log once its command has finished"""
+    exit_code = None
+    if not future.cancelled() and future.exception() is None:
+        exit_code = future.result().returncode
+    try:
+        log_catalog.record_file(log_file, exit_code=exit_code)
+    except OSError as e:
+        logging.error(f"Error recording authentication log {log_file}: {str(e)}")
+
+
+def read_log_tail(log_path, max_bytes=64 * 1024):
+    """Return the last max_bytes of a log as text"""
+    try:
+        with open(log_path, 'rb') as f:
+            f.seek(max(0, os.fstat(f.fileno()).st_size - max_bytes))
+            return f.read().decode('utf-8', errors='replace')
+    except OSError:
+        return ''
+
+
 @app.route('/authenticate/<platform>', methods=['GET', 'POST'])
 @login_required
 def authenticate(platform):
@@ -509,7 +1979,7 @@ def authenticate(platform):
         flash(f"Invalid platform: {platform}")
         return redirect(url_for('games'))
     
-    config = load_config()
+    config = config_store.view()
     auth_step = request.args.get('step', 'login')
     
     # Check if already authenticated
@@ -517,6 +1987,9 @@ def authenticate(platform):
         flash(f"You are already authenticated with {platform.capitalize()}")
         return redirect(url_for('manage_games', platform=platform))
     
+    if auth_step == 'pending':
+        return auth_status(platform, request.args.get('task', ''))
+    
     if request.method == 'POST':
         # Process authentication
         tool_path = config['prefill_tools'][platform]
@@ -526,177 +1999,876 @@ def authenticate(platform):
             flash(f"Prefill tool not found at: {tool_path}")
             return redirect(url_for('manage_games', platform=platform))
         
-        # Get credentials from form
-        if platform == 'steam':
-            username = request.form.get('username')
-            password = request.form.get('password')
-            mfa_code = request.form.get('mfa_code')
-            
-            if auth_step == 'login':
-                # First authentication step
-                log_file = os.path.join(LOG_DIR, f"auth_{platform}_{int(time.time())}.log")
-                
-                try:
-                    # For Steam, we need to handle MFA separately
-                    # Write credentials to a temp file for non-interactive login
-                    cred_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp_auth.txt')
-                    with open(cred_file, 'w') as f:
-                        f.write(f"{username}\n{password}\n")
-                    
-                    # Use SteamPrefill with credentials file
-                    cmd = f"{tool_path} login --credentials-file {cred_file}"
-                    
-                    with open(log_file, 'w') as logf:
-                        process = subprocess.Popen(
-                            cmd, 
-                            shell=True, 
-                            stdout=logf, 
-                            stderr=subprocess.STDOUT
-                        )
-                        process.wait(timeout=30)
-                    
-                    # Securely delete the credentials file
-                    if os.path.exists(cred_file):
-                        os.remove(cred_file)
-                    
-                    # Check if login was successful or if MFA is needed
-                    with open(log_file, 'r') as logf:
-                        log_content = logf.read()
-                    
-                    if "Two-factor authentication" in log_content or "Steam Guard code" in log_content:
-                        # Need MFA code
-                        return render_template('authenticate.html', 
-                                             platform=platform, 
-                                             auth_step='mfa')
-                    
-                    if "Login Successful" in log_content or is_authenticated(platform):
-                        flash(f"Successfully authenticated with {platform.capitalize()}")
-                        return redirect(url_for('manage_games', platform=platform))
-                    else:
-                        flash(f"Authentication failed. Please check your credentials and try again.")
-                
-                except Exception as e:
-                    flash(f"Error during authentication: {str(e)}")
-                    logging.error(f"Authentication error: {str(e)}")
-            
-            elif auth_step == 'mfa' and mfa_code:
-                # MFA step
-                log_file = os.path.join(LOG_DIR, f"auth_mfa_{platform}_{int(time.time())}.log")
-                
-                try:
-                    # Write MFA code to temp file
-                    mfa_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp_mfa.txt')
-                    with open(mfa_file, 'w') as f:
-                        f.write(f"{mfa_code}\n")
-                    
-                    # Use SteamPrefill with MFA code
-                    cmd = f"{tool_path} login --mfa-code-file {mfa_file}"
-                    
-                    with open(log_file, 'w') as logf:
-                        process = subprocess.Popen(
-                            cmd, 
-                            shell=True, 
-                            stdout=logf, 
-                            stderr=subprocess.STDOUT
-                        )
-                        process.wait(timeout=30)
-                    
-                    # Securely delete the MFA file
-                    if os.path.exists(mfa_file):
-                        os.remove(mfa_file)
-                    
-                    # Check if login was successful
-                    if is_authenticated(platform):
-                        flash(f"Successfully authenticated with {platform.capitalize()}")
-                        return redirect(url_for('manage_games', platform=platform))
-                    else:
-                        flash(f"Authentication failed. Please check your MFA code and try again.")
-                
-                except Exception as e:
-                    flash(f"Error during MFA verification: {str(e)}")
-                    logging.error(f"MFA verification error: {str(e)}")
-        
-        elif platform in ['epic', 'battlenet']:
-            email = request.form.get('email')
-            password = request.form.get('password')
-            
-            # Epic and Battle.net have similar authentication processes
-            log_file = os.path.join(LOG_DIR, f"auth_{platform}_{int(time.time())}.log")
-            
-            try:
-                # Write credentials to a temp file for non-interactive login
-                cred_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), f'temp_{platform}_auth.txt')
-                with open(cred_file, 'w') as f:
-                    f.write(f"{email}\n{password}\n")
-                
-                # Use prefill tool with credentials file
-                cmd = f"{tool_path} login --credentials-file {cred_file}"
-                
-                with open(log_file, 'w') as logf:
-                    process = subprocess.Popen(
-                        cmd, 
-                        shell=True, 
-                        stdout=logf, 
-                        stderr=subprocess.STDOUT
-                    )
-                    process.wait(timeout=30)
-                
-                # Securely delete the credentials file
-                if os.path.exists(cred_file):
-                    os.remove(cred_file)
-                
-                # Check if login was successful
-                if is_authenticated(platform):
-                    flash(f"Successfully authenticated with {platform.capitalize()}")
-                    return redirect(url_for('manage_games', platform=platform))
+        # The login runs in the tool pool; the pending page polls for its result
+        try:
+            if platform == 'steam':
+                if auth_step == 'mfa':
+                    # Steam Guard code for the login that asked for it
+                    task_id = submit_auth(platform, 'mfa', '--mfa-code-file',
+                                          [request.form.get('mfa_code', '')])
                 else:
-                    flash(f"Authentication failed. Please check your credentials and try again.")
-            
-            except Exception as e:
-                flash(f"Error during authentication: {str(e)}")
-                logging.error(f"Authentication error: {str(e)}")
+                    task_id = submit_auth(platform, 'login', '--credentials-file',
+                                          [request.form.get('username', ''), request.form.get('password', '')])
+            else:
+                # Epic and Battle.net have similar authentication processes
+                task_id = submit_auth(platform, 'login', '--credentials-file',
+                                      [request.form.get('email', ''), request.form.get('password', '')])
+            return redirect(url_for('authenticate', platform=platform, step='pending', task=task_id))
+        
+        except Exception as e:
+            flash(f"Error during authentication: {str(e)}")
+            logging.error(f"Authentication error: {str(e)}")
     
     # GET request or failed POST
     return render_template('authenticate.html', platform=platform, auth_step=auth_step)
 
+
+def auth_status(platform, task_id):
+    """Render the pending page for a login task, or act on its result once it has finished"""
+    with auth_tasks_lock:
+        task = auth_tasks.get(task_id)
+        if task and task['platform'] == platform and task['future'].done():
+            del auth_tasks[task_id]
+    
+    if not task or task['platform'] != platform:
+        flash("This authentication attempt has expired. Please try again.")
+        return redirect(url_for('authenticate', platform=platform))
+    
+    future = task['future']
+    if not future.done():
+        return render_template('authenticate.html', platform=platform, auth_step='pending')
+    
+    retry_step = task['step']
+    try:
+        future.result()
+        log_content = read_log_tail(task['log_file'])
+        
+        if task['step'] == 'login' and platform == 'steam' and \
+                ("Two-factor authentication" in log_content or "Steam Guard code" in log_content):
+            # Need MFA code
+            return render_template('authenticate.html', platform=platform, auth_step='mfa')
+        
+        if is_authenticated(platform) or (task['step'] == 'login' and "Login Successful" in log_content):
+            tool_cache.invalidate(platform)
+            flash(f"Successfully authenticated with {platform.capitalize()}")
+            return redirect(url_for('manage_games', platform=platform))
+        
+        if task['step'] == 'mfa':
+            flash(f"Authentication failed. Please check your MFA code and try again.")
+        else:
+            flash(f"Authentication failed. Please check your credentials and try again.")
+    
+    except subprocess.TimeoutExpired:
+        flash(f"The {platform.capitalize()} prefill tool did not finish logging in within {AUTH_TIMEOUT} seconds.")
+        logging.error(f"Authentication for {platform} timed out")
+    except Exception as e:
+        flash(f"Error during authentication: {str(e)}")
+        logging.error(f"Authentication error: {str(e)}")
+    
+    return render_template('authenticate.html', platform=platform, auth_step=retry_step)
+
 @app.route('/schedule', methods=['GET', 'POST'])
 @login_required
 def schedule():
-    config = load_config()
-    
     if request.method == 'POST':
         if 'add_schedule' in request.form:
             platform = request.form.get('platform')
             day = request.form.get('day')
-            time = request.form.get('time')
+            sched_time = request.form.get('time')
+            mode = 'delta' if request.form.get('mode') == 'delta' else 'full'
             
-            if platform and day and time:
+            if platform and day and sched_time:
                 schedule_id = str(int(time.time()))
-                config['schedules'].append({
+                sched = {
                     'id': schedule_id,
                     'platform': platform,
                     'day': day,
-                    'time': time,
+                    'time': sched_time,
+                    'mode': mode,
                     'enabled': True
-                })
-                save_config(config)
+                }
+                config_store.update(lambda config: config['schedules'].append(dict(sched)))
+                scheduler.update(sched)
                 flash("Schedule added successfully")
         
         elif 'toggle_schedule' in request.form:
             schedule_id = request.form.get('schedule_id')
-            for sched in config['schedules']:
-                if sched['id'] == schedule_id:
-                    sched['enabled'] = not sched['enabled']
-                    save_config(config)
-                    break
+            
+            def toggle(config):
+                for sched in config['schedules']:
+                    if sched['id'] == schedule_id:
+                        sched['enabled'] = not sched['enabled']
+                        return dict(sched)
+            
+            sched = config_store.update(toggle)
+            if sched:
+                scheduler.update(sched)
         
         elif 'delete_schedule' in request.form:
             schedule_id = request.form.get('schedule_id')
-            config['schedules'] = [s for s in config['schedules'] if s['id'] != schedule_id]
-            save_config(config)
+            
+            def delete(config):
+                config['schedules'] = [s for s in config['schedules'] if s['id'] != schedule_id]
+            
+            config_store.update(delete)
+            scheduler.remove(schedule_id)
             flash("Schedule removed")
     
-    return render_template('schedule.html', schedules=config['schedules'])
+    return render_template('schedule.html', schedules=config_store.view()['schedules'])
+
+SIZE_UNITS = {'b': 1, 'kb': 1000, 'mb': 1000 ** 2, 'gb': 1000 ** 3, 'tb': 1000 ** 4,
+              'kib': 1024, 'mib': 1024 ** 2, 'gib': 1024 ** 3, 'tib': 1024 ** 4}
+RATE_UNITS = {'bit/s': 1 / 8, 'kbit/s': 1000 / 8, 'mbit/s': 1000 ** 2 / 8, 'gbit/s': 1000 ** 3 / 8,
+              'b/s': 1, 'kb/s': 1000, 'mb/s': 1000 ** 2, 'gb/s': 1000 ** 3,
+              'kib/s': 1024, 'mib/s': 1024 ** 2, 'gib/s': 1024 ** 3}
+
+def parse_size(value, unit):
+    return int(float(value.replace(',', '')) * SIZE_UNITS.get(unit.lower(), 1))
+
+def parse_duration(value):
+    """Seconds from '1:02:03', '10:00.55' or '42.1'"""
+    seconds = 0.0
+    for part in value.split(':'):
+        seconds = seconds * 60 + float(part or 0)
+    return seconds
+
+
+class ProgressParser:
+    """Incremental parser for SteamPrefill/EpicPrefill/BattleNetPrefill output.
+
+    Feed it log text as it arrives; partial lines are kept until their newline.
+    It tracks the app being prefilled, each app's outcome (up to date,
+    downloaded or failed) with bytes and throughput, and running totals.
+    """
+
+    START = re.compile(r'Starting (?P<app>.+?)\s*$', re.I)
+    UP_TO_DATE = re.compile(r'up to date', re.I)
+    DOWNLOADING = re.compile(r'Downloading (?P<size>[\d.,]+)\s*(?P<unit>[KMGT]i?B)\b', re.I)
+    PROGRESS = re.compile(r'(?P<done>[\d.,]+)\s*(?P<dunit>[KMGT]i?B)\s*/\s*(?P<total>[\d.,]+)\s*(?P<tunit>[KMGT]i?B)', re.I)
+    FINISHED = re.compile(r'Finished in (?P<duration>[\d:.]+)(?:\s*-\s*(?P<rate>[\d.,]+)\s*(?P<runit>[KMG]?bit/s|[KMG]i?B/s))?', re.I)
+    FAILED = re.compile(r'(?:Unable|Failed) to (?:download|prefill)', re.I)
+
+    def __init__(self):
+        self._partial = ''
+        self.apps = {}        # app name -> {'status', 'size', 'bytes', 'rate', 'duration'}
+        self.current = None
+        self.current_done = 0
+        self.rate = None      # bytes/s of the last finished download
+
+    def feed(self, text):
+        """Parse new text; returns True if any progress state changed"""
+        lines = (self._partial + text).split('\n')
+        self._partial = lines.pop()
+        changed = False
+        for line in lines:
+            changed = self._parse_line(line.rstrip('\r')) or changed
+        return changed
+
+    def _parse_line(self, line):
+        match = self.START.search(line)
+        if match:
+            self.current = match.group('app')
+            self.current_done = 0
+            self.apps[self.current] = {'status': 'checking', 'size': None, 'bytes': 0, 'rate': None, 'duration': None}
+            return True
+        if self.current is None:
+            return False
+
+        app = self.apps[self.current]
+        match = self.FINISHED.search(line)
+        if match:
+            app['duration'] = parse_duration(match.group('duration'))
+            if match.group('rate'):
+                app['rate'] = float(match.group('rate').replace(',', '')) * RATE_UNITS.get(match.group('runit').lower(), 1)
+                self.rate = app['rate']
+            app['bytes'] = app['size'] or self.current_done
+            app['status'] = 'downloaded'
+            self.current, self.current_done = None, 0
+            return True
+        if self.UP_TO_DATE.search(line):
+            app['status'] = 'up_to_date'
+            self.current, self.current_done = None, 0
+            return True
+        if self.FAILED.search(line):
+            app['status'] = 'failed'
+            app['bytes'] = self.current_done
+            self.current, self.current_done = None, 0
+            return True
+        match = self.PROGRESS.search(line)
+        if match:
+            self.current_done = parse_size(match.group('done'), match.group('dunit'))
+            app['size'] = parse_size(match.group('total'), match.group('tunit'))
+            app['status'] = 'downloading'
+            return True
+        match = self.DOWNLOADING.search(line)
+        if match:
+            app['size'] = parse_size(match.group('size'), match.group('unit'))
+            app['status'] = 'downloading'
+            return True
+        return False
+
+    def bytes_downloaded(self):
+        return sum(a['bytes'] for a in self.apps.values()) + self.current_done
+
+    def summary(self):
+        counts = collections.Counter(a['status'] for a in self.apps.values())
+        current = self.apps.get(self.current) if self.current else None
+        eta = None
+        if current and current['size'] and self.rate:
+            eta = max(current['size'] - self.current_done, 0) / self.rate
+        return {
+            'current_app': self.current,
+            'bytes_downloaded': self.bytes_downloaded(),
+            'rate': self.rate,
+            'eta_seconds': eta,
+            'apps_downloaded': counts['downloaded'],
+            'apps_up_to_date': counts['up_to_date'],
+            'apps_failed': counts['failed']
+        }
+
+
+class JobMetrics:
+    """Per-job progress time series and per-app results, stored next to the log catalog"""
+
+    def __init__(self, path):
+        self.path = path
+        connect_db(self.path).executescript('''
+            CREATE TABLE IF NOT EXISTS job_samples (
+                job_id TEXT NOT NULL,
+                ts TEXT NOT NULL,
+                bytes INTEGER NOT NULL,
+                rate REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_job_samples_job ON job_samples (job_id, ts);
+            CREATE TABLE IF NOT EXISTS job_apps (
+                job_id TEXT NOT NULL,
+                platform TEXT,
+                app TEXT NOT NULL,
+                status TEXT,
+                bytes INTEGER,
+                rate REAL,
+                duration REAL,
+                finished TEXT,
+                PRIMARY KEY (job_id, app)
+            );
+            CREATE INDEX IF NOT EXISTS idx_job_apps_finished ON job_apps (finished);
+        ''')
+
+    FINAL_STATUSES = ('downloaded', 'up_to_date', 'failed')
+
+    def record(self, job, apps, bytes_downloaded, rate):
+        """Append a sample and upsert the per-app results in apps (those that changed since the last call).
+
+        An app's finished time is set once it reaches a final status.
+        """
+        now = datetime.datetime.now().isoformat()
+        with connect_db(self.path) as conn:
+            conn.execute('INSERT INTO job_samples (job_id, ts, bytes, rate) VALUES (?, ?, ?, ?)',
+                         (job['id'], now, bytes_downloaded, rate))
+            conn.executemany(
+                'INSERT OR REPLACE INTO job_apps (job_id, platform, app, status, bytes, rate, duration, finished) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(job['id'], job['platform'], name, a['status'], a['bytes'], a['rate'], a['duration'],
+                  now if a['status'] in self.FINAL_STATUSES else None)
+                 for name, a in apps.items()])
+
+    def prune(self, before):
+        """Drop samples and app results recorded before an ISO timestamp"""
+        with connect_db(self.path) as conn:
+            conn.execute('DELETE FROM job_samples WHERE ts < ?', (before,))
+            conn.execute('DELETE FROM job_apps WHERE finished < ?', (before,))
+            # Apps a job never finished have no time of their own; they go with the job's samples
+            conn.execute('DELETE FROM job_apps WHERE finished IS NULL AND job_id NOT IN '
+                         '(SELECT DISTINCT job_id FROM job_samples)')
+
+    def samples(self, job_id):
+        return [dict(r) for r in connect_db(self.path).execute(
+            'SELECT ts, bytes, rate FROM job_samples WHERE job_id = ? ORDER BY ts', (job_id,))]
+
+    def apps(self, job_id):
+        return [dict(r) for r in connect_db(self.path).execute(
+            'SELECT app, status, bytes, rate, duration FROM job_apps WHERE job_id = ? '
+            'ORDER BY finished IS NULL, finished', (job_id,))]
+
+    def top_apps(self, days=30, limit=10):
+        """Apps that used the most download time and bytes over the last days"""
+        since = (datetime.datetime.now() - datetime.timedelta(days=days)).isoformat()
+        return [dict(r) for r in connect_db(self.path).execute(
+            'SELECT platform, app, SUM(bytes) AS bytes, SUM(duration) AS duration, COUNT(*) AS runs '
+            "FROM job_apps WHERE status = 'downloaded' AND finished >= ? "
+            'GROUP BY platform, app ORDER BY duration DESC LIMIT ?', (since, limit))]
+
+
+job_metrics = JobMetrics(HISTORY_DB_FILE)
+
+
+class ProgressTracker:
+    """Follows one running job's log from a byte offset and feeds a ProgressParser"""
+
+    def __init__(self, job):
+        self.job = job
+        self.parser = ProgressParser()
+        self._offset = 0
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._last = (time.monotonic(), (None, 0))
+        self._recorded = {}  # app name -> its results as last written to job_metrics
+
+    def poll(self, final=False):
+        """Parse whatever the job wrote since the last poll; returns the summary if it changed"""
+        changed = False
+        try:
+            with open(self.job['log_file'], 'rb') as f:
+                f.seek(self._offset)
+                while True:
+                    chunk = f.read(LOG_STREAM_CHUNK)
+                    if not chunk:
+                        break
+                    changed = self.parser.feed(self._decoder.decode(chunk)) or changed
+                self._offset = f.tell()
+        except OSError:
+            pass
+        if final:
+            # The process is gone, so a last line without a newline is complete
+            changed = self.parser.feed('\n') or changed
+        if not changed:
+            return None
+
+        # Measured throughput while a download reports progress; otherwise the tool's own
+        # figure, since a finished app credits all of its bytes at once
+        now, position = time.monotonic(), (self.parser.current, self.parser.current_done)
+        elapsed = now - self._last[0]
+        rate = self.parser.rate
+        if position[0] and position[0] == self._last[1][0] and position[1] > self._last[1][1] and elapsed > 0:
+            rate = (position[1] - self._last[1][1]) / elapsed
+        self._last = (now, position)
+        # Only apps whose state moved since the last poll are written
+        apps = {name: dict(a) for name, a in self.parser.apps.items() if self._recorded.get(name) != a}
+        job_metrics.record(self.job, apps, self.parser.bytes_downloaded(), rate)
+        self._recorded.update(apps)
+        summary = self.parser.summary()
+        summary['rate'] = rate
+        return summary
+
+
+def apply_job_results(job, parser):
+    """Record last_prefilled, bytes and duration for the games a finished job's output confirms.
+
+    Only apps whose output shows a completed download or an up-to-date check
+    count; an app the job was still working on when it exited does not. All
+    updates are applied as one batched write.
+    """
+    if job['kind'] != 'prefill':
+        return 0
+    by_name = {g['name'].strip().casefold(): g['id']
+               for g in config_store.view()['games'].get(job['platform'], []) if g.get('name')}
+    # Library sizes at prefill time let delta runs spot games that were updated since
+    sizes = {g['id']: g.get('size') for g in tool_cache.peek(('library', job['platform'])) or []}
+    updates = {}
+    for name, result in parser.apps.items():
+        game_id = by_name.get(name.strip().casefold())
+        if game_id is None or result['status'] not in ('downloaded', 'up_to_date'):
+            continue
+        updates[game_id] = {
+            'last_prefilled': job['finished'],
+            'last_prefill_bytes': result['bytes'],
+            'last_prefill_duration': result['duration']
+        }
+        if sizes.get(game_id):
+            updates[game_id]['prefilled_size'] = sizes[game_id]
+    if updates:
+        config_store.update_games(job['platform'], updates)
+    if job['exit_code'] != 0:
+        logging.warning(f"Job {job['id']} exited with {job['exit_code']}; "
+                        f"recorded {len(updates)} games its output confirmed")
+    return len(updates)
+
+
+def process_alive(pid, executable):
+    """True if pid is a live process running executable, so a reused pid is not mistaken for a job"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as f:
+            argv = f.read().decode(errors='replace').split('\0')
+    except OSError:
+        return True  # No /proc to check against
+    # Scripts show up as their interpreter followed by the script path
+    return executable in argv[:2]
+
+
+class AdoptedProcess:
+    """Stands in for the Popen of a job started by a previous dashboard process.
+
+    It is not our child, so wait() can only poll for it to disappear and
+    never learns the exit code.
+    """
+
+    def __init__(self, pid, executable):
+        self.pid = pid
+        self.executable = executable
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while process_alive(self.pid, self.executable):
+            if time.monotonic() >= deadline:
+                raise subprocess.TimeoutExpired(self.executable, timeout)
+            time.sleep(min(0.5, timeout))
+        return None
+
+
+class JobManager:
+    """In-process registry of prefill jobs with per-platform concurrency limits.
+
+    Jobs over a platform's limit (or the global limit) wait in a FIFO queue and
+    are started as running jobs finish. Each running job has one watcher thread
+    that waits on its process and records the exit code.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._jobs = {}    # job id -> job dict, in submission order
+        self._queue = []   # job ids waiting for a free slot
+        self._procs = {}   # job id -> subprocess.Popen, or AdoptedProcess
+        self._revision = 0  # bumped on every change to the registry
+
+    def _limits(self):
+        config = config_store.view()
+        return config.get('max_prefill_jobs', MAX_PREFILL_JOBS), config.get('job_limits', {})
+
+    def submit(self, platform, command, kind='prefill', selection=None, priority=None):
+        """Register a job and start it now if a slot is free, otherwise queue it.
+
+        selection, if given, is written to the tool just before the job starts,
+        and the dashboard's selection is written back once it finishes. Queued jobs
+        start in priority order (lower first), then submission order; the
+        default priority is the platform's place in "platform_priority".
+        """
+        if priority is None:
+            order = platform_priority()
+            priority = order.index(platform) if platform in order else len(order)
+        with self._lock:
+            job_id = f"{platform}_{int(time.time())}"
+            suffix = 1
+            while job_id in self._jobs or os.path.exists(os.path.join(LOG_DIR, f"{job_id}.log")):
+                suffix += 1
+                job_id = f"{platform}_{int(time.time())}_{suffix}"
+            job = {
+                'id': job_id,
+                'platform': platform,
+                'kind': kind,
+                'command': command,
+                'log_file': os.path.join(LOG_DIR, f"{job_id}.log"),
+                'status': 'queued',
+                'queued_at': datetime.datetime.now().isoformat(),
+                'started': None,
+                'finished': None,
+                'pid': None,
+                'exit_code': None,
+                'progress': None,
+                'selection': selection,
+                'priority': priority,
+                'bandwidth_mbps': None
+            }
+            self._jobs[job_id] = job
+            self._queue.append(job_id)
+            self._dispatch()
+            self._trim_history()
+            return dict(job)
+
+    def _running(self, platform=None):
+        """Jobs holding a slot: running, or starting while their selection is applied"""
+        return [j for j in self._jobs.values()
+                if j['status'] in ('starting', 'running') and (platform is None or j['platform'] == platform)]
+
+    def _dispatch(self):
+        max_jobs, platform_limits = self._limits()
+        running = len(self._running())
+        # sorted() is stable, so equal priorities keep submission order
+        for job_id in sorted(self._queue, key=lambda job_id: self._jobs[job_id]['priority']):
+            if running >= max_jobs:
+                break
+            job = self._jobs[job_id]
+            if len(self._running(job['platform'])) >= platform_limits.get(job['platform'], 1):
+                continue
+            self._queue.remove(job_id)
+            job['status'] = 'starting'
+            running += 1
+            # Applying a selection is a tool command that can take minutes, so it runs outside the lock
+            threading.Thread(target=self._run, args=(job_id,), daemon=True).start()
+        self._rebalance_bandwidth()
+        self._changed()
+
+    def _rebalance_bandwidth(self):
+        """Share "uplink_mbps" between running jobs, honouring per-platform "bandwidth_limits".
+
+        Jobs capped below their fair share leave the remainder to the others
+        (water-filling). Changed caps are passed to "bandwidth_hook"; without
+        a hook nothing enforces them, so no job is given one.
+        """
+        config = config_store.view()
+        if not config.get('bandwidth_hook'):
+            for job in self._running():
+                job['bandwidth_mbps'] = None
+            return
+        platform_caps = config.get('bandwidth_limits', {})
+        remaining = config.get('uplink_mbps') or float('inf')
+        running = sorted((j for j in self._running() if j['status'] == 'running'),
+                         key=lambda j: platform_caps.get(j['platform']) or float('inf'))
+        calls = []
+        for i, job in enumerate(running):
+            fair_share = remaining / (len(running) - i)
+            cap = min(platform_caps.get(job['platform']) or float('inf'), fair_share)
+            remaining -= cap
+            cap = None if cap == float('inf') else round(cap, 1)
+            if cap != job['bandwidth_mbps']:
+                job['bandwidth_mbps'] = cap
+                calls.append(('limit', dict(job)))
+        if calls:
+            run_bandwidth_hook(calls)
+
+    def recover(self):
+        """Adopt the prefills a previous dashboard process left running and mark its other jobs interrupted.
+
+        Prefills run in their own session, so they outlive a restart. A live
+        one is registered as running again and holds its slot, so no second
+        job starts for its platform until its process exits.
+        """
+        config = config_store.view()
+        pending = config.get('pending_restore', {})
+        for row in log_catalog.unfinished():
+            platform = row['platform']
+            tool_path = config['prefill_tools'].get(platform)
+            if row['kind'] != 'prefill' or not row['pid'] or not tool_path or not process_alive(row['pid'], tool_path):
+                logging.warning(f"Job {row['job_id']} was interrupted by a dashboard restart")
+                log_catalog.interrupt(row['filename'])
+                continue
+            marker = pending.get(platform, {})
+            job = {
+                'id': row['job_id'],
+                'platform': platform,
+                'kind': row['kind'],
+                'command': prefill_command(platform, config),
+                'log_file': os.path.join(LOG_DIR, row['filename']),
+                'status': 'running',
+                'queued_at': row['started'],
+                'started': row['started'],
+                'finished': None,
+                'pid': row['pid'],
+                'exit_code': None,
+                'progress': None,
+                # A delta job restores the full selection when it finishes, as it would have
+                'selection': marker['selection'] if marker.get('job_id') == row['job_id'] else None,
+                'priority': 0,
+                'bandwidth_mbps': None
+            }
+            process = AdoptedProcess(row['pid'], tool_path)
+            with self._lock:
+                self._jobs[job['id']] = job
+                self._procs[job['id']] = process
+                self._rebalance_bandwidth()
+                self._changed()
+            logging.info(f"Adopted job {job['id']} (pid {row['pid']}) left running by the previous dashboard process")
+            threading.Thread(target=self._watch, args=(job['id'], process), daemon=True).start()
+
+    def _run(self, job_id):
+        process = self._start(self.get(job_id))
+        if process is not None:
+            self._watch(job_id, process)
+
+    def _start(self, job):
+        """Apply the job's selection and launch its process; returns the process, or None if it failed"""
+        if job['selection'] is not None:
+            # Recorded before the tool is narrowed, so a restart still writes the full selection back
+            def mark(config):
+                config.setdefault('pending_restore', {})[job['platform']] = {
+                    'job_id': job['id'], 'selection': job['selection']}
+            config_store.update(mark)
+            if not update_tool_selections(job['platform'], job['selection']):
+                logging.error(f"Could not apply the reduced selection for job {job['id']}")
+                self._finish(job['id'], None)
+                return None
+        logging.info(f"Running prefill command: {' '.join(job['command'])}")
+        try:
+            with open(job['log_file'], 'w') as logf:
+                process = subprocess.Popen(
+                    job['command'],
+                    stdout=logf,
+                    stderr=subprocess.STDOUT,
+                    # Make sure the process can run in background
+                    start_new_session=True
+                )
+        except Exception as e:
+            logging.error(f"Error starting job {job['id']}: {str(e)}")
+            self._finish(job['id'], None)
+            return None
+
+        with self._lock:
+            job = self._jobs[job['id']]
+            job.update(status='running', pid=process.pid, started=datetime.datetime.now().isoformat())
+            self._procs[job['id']] = process
+            log_catalog.record_job(job)
+            self._rebalance_bandwidth()
+            self._changed()
+        return process
+
+    def _watch(self, job_id, process):
+        tracker = ProgressTracker(self.get(job_id))
+        while True:
+            try:
+                exit_code = process.wait(timeout=PROGRESS_POLL_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                self._update_progress(job_id, tracker.poll())
+        self._update_progress(job_id, tracker.poll(final=True))
+        logging.info(f"Job {job_id} finished with exit code {exit_code}")
+        status = None
+        if isinstance(process, AdoptedProcess):
+            # No exit code for an adopted process: it failed if an app failed or was left unfinished
+            summary = tracker.parser.summary()
+            status = 'failed' if summary['apps_failed'] or summary['current_app'] else 'succeeded'
+        finished_job = self._finish(job_id, exit_code, status)
+        self._record_metrics(finished_job, tracker.parser)
+        try:
+            apply_job_results(finished_job, tracker.parser)
+        except Exception as e:
+            logging.error(f"Error recording results of job {job_id}: {str(e)}")
+
+    def _finish(self, job_id, exit_code, status=None):
+        """Restore the job's selection, then mark it finished and start queued jobs; returns the job.
+
+        The job keeps its slot until the tool has the full selection again, so
+        a job queued behind it never starts on the subset. A selection saved
+        while the subset was applied is only written by this restore, so it is
+        written again until it matches the dashboard's.
+        """
+        job = self.get(job_id)
+        restored = self._restore_selection(job)
+        while True:
+            with self._lock:
+                if restored is None or restored == dashboard_selection(job['platform']):
+                    job = self._jobs[job_id]
+                    job.update(status=status or ('succeeded' if exit_code == 0 else 'failed'),
+                               exit_code=exit_code,
+                               finished=datetime.datetime.now().isoformat())
+                    self._procs.pop(job_id, None)
+                    if job['started']:
+                        log_catalog.record_job(job)
+                    finished_job = dict(job)
+                    if job['bandwidth_mbps'] is not None:
+                        run_bandwidth_hook([('clear', finished_job)])
+                    self._dispatch()
+                    return finished_job
+            restored = self._restore_selection(job)
+
+    def _record_metrics(self, job, parser):
+        metrics.inc('dashboard_prefill_jobs_total', platform=job['platform'], kind=job['kind'], status=job['status'])
+        metrics.inc('dashboard_prefill_bytes_total', parser.bytes_downloaded(), platform=job['platform'])
+        if job['started']:
+            duration = (datetime.datetime.fromisoformat(job['finished']) -
+                        datetime.datetime.fromisoformat(job['started'])).total_seconds()
+            metrics.observe('dashboard_prefill_job_duration_seconds', duration, platform=job['platform'])
+
+    def _restore_selection(self, job):
+        """Write the dashboard's current selection back to the tool; returns it, or None if there was nothing to do"""
+        if job['selection'] is None:
+            return None
+        selection = dashboard_selection(job['platform'])
+        if not update_tool_selections(job['platform'], selection):
+            logging.error(f"Could not restore the {job['platform']} selection after job {job['id']}")
+            return None
+
+        def clear(config):
+            pending = config.get('pending_restore', {})
+            if pending.get(job['platform'], {}).get('job_id') == job['id']:
+                del pending[job['platform']]
+        config_store.update(clear)
+        return selection
+
+    def restore_pending(self, platform=None):
+        """Write the full selection back where a delta job left the tool narrowed, e.g. across a restart.
+
+        Platforms whose delta job is still running are skipped; that job
+        restores the selection when it finishes.
+        """
+        for name, pending in list(config_store.view().get('pending_restore', {}).items()):
+            if platform is not None and name != platform:
+                continue
+            with self._lock:
+                if any(j['selection'] is not None for j in self._running(name)):
+                    continue
+            logging.info(f"Restoring the {name} selection narrowed by job {pending['job_id']}")
+            self._restore_selection({'id': pending['job_id'], 'platform': name, 'selection': pending['selection']})
+
+    def _update_progress(self, job_id, progress):
+        if progress is None:
+            return
+        with self._lock:
+            # Replace rather than mutate, snapshots from jobs() share the old dict
+            self._jobs[job_id]['progress'] = progress
+            self._changed()
+
+    def _changed(self):
+        self._revision += 1
+        event_bus.publish('jobs', {'active_jobs': get_active_jobs()})
+
+    def revision(self):
+        """Counter that changes whenever a job is added, starts, progresses or finishes"""
+        return self._revision
+
+    def _trim_history(self):
+        finished = [job_id for job_id, j in self._jobs.items() if j['status'] not in ACTIVE_JOB_STATUSES]
+        for job_id in finished[:-JOB_HISTORY_SIZE]:
+            del self._jobs[job_id]
+            self._changed()
+
+    def selection_overridden(self, platform):
+        """True while a job has replaced the platform's tool selection with a subset that is not restored yet"""
+        if platform in config_store.view().get('pending_restore', {}):
+            return True
+        with self._lock:
+            return any(j['selection'] is not None for j in self._running(platform))
+
+    def job_for_log(self, filename):
+        """Return the registered job that writes to a log file name, if any"""
+        return self.get(filename[:-len('.log')]) if filename.endswith('.log') else None
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def jobs(self, statuses=None):
+        """Snapshot of registered jobs, newest first, optionally filtered by status"""
+        with self._lock:
+            return [dict(j) for j in reversed(list(self._jobs.values()))
+                    if statuses is None or j['status'] in statuses]
+
+
+job_manager = JobManager()
+
+
+def dashboard_selection(platform):
+    """IDs of the games selected for a platform in the dashboard"""
+    return [g['id'] for g in config_store.view()['games'].get(platform, [])]
+
+
+def prefill_command(platform, config):
+    """Build the prefill command line for a platform's tool"""
+    tool_path = config['prefill_tools'][platform]
+    # SteamPrefill, EpicPrefill and BattleNetPrefill all use the 'prefill' command;
+    # "prefill_extra_args" passes tool options such as their own download limits
+    extra_args = config.get('prefill_extra_args', {}).get(platform, [])
+    return [tool_path, 'prefill', '--non-interactive'] + list(extra_args)
+
+
+def platform_priority():
+    """Platforms in the order "run all" starts them and queued jobs are preferred"""
+    order = config_store.view().get('platform_priority', PLATFORMS)
+    return order + [p for p in PLATFORMS if p not in order]
+
+
+_bandwidth_hook_queue = queue.Queue()
+_bandwidth_hook_thread = None
+
+def run_bandwidth_hook(calls):
+    """Queue (action, job) pairs for the configured traffic-shaping hook.
+
+    One worker thread runs them in order, as: <hook> limit|clear <job id> <pid> <platform> <mbit/s>
+    """
+    global _bandwidth_hook_thread
+    if not config_store.view().get('bandwidth_hook'):
+        return
+    for call in calls:
+        _bandwidth_hook_queue.put(call)
+    if _bandwidth_hook_thread is None:
+        _bandwidth_hook_thread = threading.Thread(target=_bandwidth_hook_worker, daemon=True)
+        _bandwidth_hook_thread.start()
+
+def _bandwidth_hook_worker():
+    while True:
+        action, job = _bandwidth_hook_queue.get()
+        hook = config_store.view().get('bandwidth_hook')
+        if not hook:
+            continue
+        cmd = [hook, action, job['id'], str(job['pid'] or 0), job['platform'], str(job['bandwidth_mbps'] or 0)]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            if result.returncode != 0:
+                logging.error(f"Bandwidth hook failed for {job['id']}: {result.stderr.strip()}")
+        except Exception as e:
+            logging.error(f"Error running bandwidth hook for {job['id']}: {str(e)}")
+
+
+def select_delta_games(platform, max_age_days=None):
+    """IDs of selected games that were never prefilled, are older than max_age_days, or changed in the library"""
+    config = config_store.view()
+    if max_age_days is None:
+        max_age_days = config.get('delta_max_age_days', DELTA_MAX_AGE_DAYS)
+    cutoff = (datetime.datetime.now() - datetime.timedelta(days=max_age_days)).isoformat()
+    sizes = {g['id']: g.get('size') for g in get_user_game_library(platform)}
+    # Titles the library snapshots saw change since the oldest prefill still in the window
+    changed = library_snapshots.changed_since(platform, cutoff)
+    
+    stale = []
+    for game in config['games'][platform]:
+        current_size = sizes.get(game['id'])
+        if not game.get('last_prefilled') or game['last_prefilled'] < cutoff:
+            stale.append(game['id'])
+        elif game.get('prefilled_size') and current_size and current_size != game['prefilled_size']:
+            stale.append(game['id'])
+        elif changed.get(game['id'], '') > game['last_prefilled']:
+            stale.append(game['id'])
+    return stale
+
+
+def start_prefill(platform, mode='full'):
+    """Submit a prefill job for a platform.
+
+    In 'delta' mode only stale or changed games are selected in the tool for
+    the run, and the full selection is restored when it finishes. Returns the
+    job, or None if there is nothing to prefill.
+    """
+    config = config_store.view()
+    games = config['games'][platform]
+    if not games:
+        return None
+
+    # last_prefilled is set when the job finishes, from what its output confirms
+    command = prefill_command(platform, config)
+    if mode != 'delta':
+        return job_manager.submit(platform, command)
+
+    stale = select_delta_games(platform)
+    if not stale:
+        logging.info(f"Delta prefill for {platform} skipped: all games are current")
+        return None
+    logging.info(f"Delta prefill for {platform}: {len(stale)} of {len(games)} games")
+    return job_manager.submit(platform, command, selection=stale)
+
+
+@app.route('/run_all')
+@login_required
+def run_all_prefills():
+    """Submit a prefill for every platform in priority order; the job manager runs them in parallel"""
+    mode = request.args.get('mode', 'full')
+    started, skipped = [], []
+    for platform in platform_priority():
+        try:
+            job = start_prefill(platform, mode=mode)
+        except Exception as e:
+            logging.error(f"Error starting prefill for {platform}: {str(e)}")
+            job = None
+        (started if job else skipped).append(platform)
+    
+    if started:
+        flash(f"Submitted prefill jobs for {', '.join(started)}.")
+    if skipped:
+        flash(f"Nothing to prefill for {', '.join(skipped)}.")
+    return redirect(url_for('dashboard'))
 
 @app.route('/run/<platform>')
 @login_required
@@ -705,147 +2877,1220 @@ def run_prefill(platform):
         flash(f"Invalid platform: {platform}")
         return redirect(url_for('dashboard'))
     
-    config = load_config()
-    games = config['games'][platform]
-    
-    if not games:
-        flash(f"No games configured for {platform}")
-        return redirect(url_for('games'))
-    
-    # Start prefill job in background
-    job_id = f"{platform}_{int(time.time())}"
-    log_file = os.path.join(LOG_DIR, f"{job_id}.log")
-    
+    mode = request.args.get('mode', 'full')
     try:
-        # Get prefill tool path
-        tool_path = config['prefill_tools'][platform]
-        
-        # Build the appropriate command based on platform
-        if platform == 'steam':
-            # SteamPrefill uses the 'prefill' command
-            command = f"{tool_path} prefill --non-interactive"
-        elif platform == 'epic':
-            # EpicPrefill uses the 'prefill' command
-            command = f"{tool_path} prefill --non-interactive"
-        elif platform == 'battlenet':
-            # BattleNetPrefill uses the 'prefill' command
-            command = f"{tool_path} prefill --non-interactive"
-        
-        # Add logging to help diagnose any issues
-        logging.info(f"Running prefill command: {command}")
-        
-        # Run the command
-        with open(log_file, 'w') as logf:
-            process = subprocess.Popen(
-                command, 
-                shell=True, 
-                stdout=logf, 
-                stderr=subprocess.STDOUT,
-                # Make sure the process can run in background
-                start_new_session=True
-            )
-        
-        flash(f"Started prefill job for {platform}. Check logs for progress.")
-        
-        # Update last_prefilled for all games in this platform
-        now = datetime.datetime.now().isoformat()
-        for game in config['games'][platform]:
-            game['last_prefilled'] = now
-        save_config(config)
+        job = start_prefill(platform, mode=mode)
+        if job is None and not config_store.view()['games'][platform]:
+            flash(f"No games configured for {platform}")
+            return redirect(url_for('games'))
+        if job is None:
+            flash(f"All {platform} games were prefilled recently. Nothing to do.")
+        elif job['status'] == 'queued':
+            flash(f"Queued prefill job for {platform}. It will start when a running job finishes.")
+        elif job['status'] == 'failed':
+            flash(f"Error starting prefill for {platform}. Check the dashboard log for details.")
+        else:
+            flash(f"Started prefill job for {platform}. Check logs for progress.")
     except Exception as e:
         flash(f"Error starting prefill: {str(e)}")
         logging.error(f"Error starting prefill: {str(e)}")
     
     return redirect(url_for('dashboard'))
 
+class Scheduler:
+    """Runs saved schedules: a min-heap of (next run, schedule id) and one thread sleeping until the earliest.
+
+    Entries are invalidated lazily: the heap may hold outdated pairs, and only
+    the one matching _next_runs for a schedule id is acted on. Schedules saved
+    by another dashboard process are picked up when the config revision
+    changes, checked every SCHEDULER_POLL_SECONDS.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._heap = []
+        self._next_runs = {}   # schedule id -> next run datetime
+        self._signatures = {}  # schedule id -> schedule as last pushed, without last_run
+        self._revision = None  # config revision the schedules were last read at
+        self._thread = None
+
+    def start(self):
+        with self._cond:
+            if self._thread:
+                return
+            now = datetime.datetime.now()
+            self._revision = config_store.revision()
+            for sched in config_store.view()['schedules']:
+                if sched.get('enabled') and self._missed_run(sched, now):
+                    logging.info(f"Catching up missed {sched['platform']} schedule {sched['id']}")
+                    self._signatures[sched['id']] = self._signature(sched)
+                    self._next_runs[sched['id']] = now
+                    heapq.heappush(self._heap, (now, sched['id']))
+                else:
+                    self._push(sched, now)
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _missed_run(self, sched, now):
+        """True if the most recent run time passed without a run, within the catch-up window"""
+        next_run = next_schedule_run(sched, now)
+        if next_run is None:
+            return False
+        previous = next_run - datetime.timedelta(days=7) if next_run > now else next_run
+        window = config_store.view().get('schedule_catchup_hours', SCHEDULE_CATCHUP_HOURS)
+        if now - previous > datetime.timedelta(hours=window):
+            return False
+        try:
+            created = datetime.datetime.fromtimestamp(int(sched['id']))
+        except (ValueError, TypeError, OSError):
+            created = datetime.datetime.min
+        last_run = sched.get('last_run')
+        last_run = datetime.datetime.fromisoformat(last_run) if last_run else created
+        return last_run < previous and created < previous
+
+    @staticmethod
+    def _signature(sched):
+        return json.dumps({k: v for k, v in sched.items() if k != 'last_run'}, sort_keys=True)
+
+    def _push(self, sched, now):
+        self._signatures[sched['id']] = self._signature(sched)
+        if sched.get('last_run'):
+            # Look past the minute of the last run so a schedule doesn't fire twice
+            now = max(now, datetime.datetime.fromisoformat(sched['last_run']) + datetime.timedelta(minutes=1))
+        next_run = next_schedule_run(sched, now) if sched.get('enabled') else None
+        if next_run is None:
+            self._next_runs.pop(sched['id'], None)
+            return
+        self._next_runs[sched['id']] = next_run
+        heapq.heappush(self._heap, (next_run, sched['id']))
+
+    def update(self, sched):
+        """Recompute the next run of one added or changed schedule"""
+        with self._cond:
+            self._push(sched, datetime.datetime.now())
+            self._cond.notify()
+
+    def remove(self, schedule_id):
+        with self._cond:
+            self._signatures.pop(schedule_id, None)
+            self._next_runs.pop(schedule_id, None)
+            self._cond.notify()
+
+    def _sync(self, now):
+        """Push schedules added, changed or removed since the config revision last seen"""
+        revision = config_store.revision()
+        if revision == self._revision:
+            return
+        self._revision = revision
+        schedules = {s['id']: s for s in config_store.view()['schedules']}
+        for schedule_id in [i for i in self._signatures if i not in schedules]:
+            del self._signatures[schedule_id]
+            self._next_runs.pop(schedule_id, None)
+        for schedule_id, sched in schedules.items():
+            if self._signatures.get(schedule_id) != self._signature(sched):
+                self._push(sched, now)
+
+    def next_runs(self):
+        with self._cond:
+            return dict(self._next_runs)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                schedule_id = None
+                while schedule_id is None:
+                    self._sync(datetime.datetime.now())
+                    if not self._heap:
+                        self._cond.wait(SCHEDULER_POLL_SECONDS)
+                        continue
+                    next_run, candidate = self._heap[0]
+                    if self._next_runs.get(candidate) != next_run:
+                        heapq.heappop(self._heap)  # Stale entry
+                        continue
+                    delay = (next_run - datetime.datetime.now()).total_seconds()
+                    if delay > 0:
+                        # Wake up regularly so clock and config changes are noticed
+                        self._cond.wait(min(delay, SCHEDULER_POLL_SECONDS))
+                        continue
+                    heapq.heappop(self._heap)
+                    del self._next_runs[candidate]
+                    schedule_id = candidate
+            self._fire(schedule_id)
+
+    def _fire(self, schedule_id):
+        now = datetime.datetime.now()
+        sched = next((s for s in config_store.view()['schedules'] if s['id'] == schedule_id), None)
+        if sched is None or not sched.get('enabled'):
+            return
+        try:
+            # Same code path as /run/<platform>
+            job = start_prefill(sched['platform'], mode=sched.get('mode', 'full'))
+            if job is None:
+                logging.warning(f"Scheduled prefill for {sched['platform']} skipped: nothing to prefill")
+            else:
+                logging.info(f"Scheduled prefill {job['id']} submitted for schedule {schedule_id}")
+        except Exception as e:
+            logging.error(f"Error running scheduled prefill for {sched['platform']}: {str(e)}")
+
+        def record_run(config):
+            for s in config['schedules']:
+                if s['id'] == schedule_id:
+                    s['last_run'] = now.isoformat()
+                    return dict(s)
+        sched = config_store.update(record_run) or sched
+        with self._cond:
+            if schedule_id not in self._next_runs:
+                self._push(sched, now + datetime.timedelta(minutes=1))
+
+
+scheduler = Scheduler()
+
+
+_service_lock = None
+
+def start_background_services():
+    """Start the threads that work outside of requests, in one process only.
+
+    Raises RuntimeError if another dashboard process serving this directory
+    holds the lock. Jobs, login throttling and live streams are all kept in
+    memory, so a second process could only serve a half-working dashboard.
+    """
+    global _service_lock
+    if _service_lock is None:
+        lock = open(SERVICE_LOCK_FILE, 'a+')
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.seek(0)
+            holder = lock.read().strip() or 'unknown'
+            lock.close()
+            message = (f"Another dashboard process (pid {holder}) already serves this installation "
+                       f"(lock: {SERVICE_LOCK_FILE}); run a single worker, e.g. gunicorn -w 1")
+            logging.error(message)
+            raise RuntimeError(message)
+        lock.truncate(0)
+        lock.write(f"{os.getpid()}\n")
+        lock.flush()
+        # Kept open for the life of the process; the OS releases the lock on exit
+        _service_lock = lock
+        job_manager.recover()
+        job_manager.restore_pending()
+    scheduler.start()
+    log_retention.start()
+    access_log.start()
+    cache_usage.start()
+
+
+class LogCatalog:
+    """SQLite index of the files in LOG_DIR: job id, platform, kind, times, size and exit status.
+
+    Jobs update their rows when they start and finish. Files written by other
+    means are picked up by a reconcile pass that only lists LOG_DIR when its
+    mtime has changed and only stats files not seen before.
+    """
+
+    def __init__(self, path, log_dir):
+        self.path = path
+        self.log_dir = log_dir
+        self._lock = threading.Lock()
+        self._dir_stamp = None
+        self._revision_lock = threading.Lock()
+        self.revision = 0  # bumped by every change made through this catalog
+        connect_db(self.path).executescript('''
+            CREATE TABLE IF NOT EXISTS logs (
+                filename TEXT PRIMARY KEY,
+                job_id TEXT,
+                platform TEXT,
+                kind TEXT,
+                started TEXT,
+                finished TEXT,
+                size INTEGER,
+                status TEXT,
+                exit_code INTEGER,
+                pid INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_logs_started ON logs (started);
+            CREATE INDEX IF NOT EXISTS idx_logs_platform_kind ON logs (platform, kind, started);
+        ''')
+        conn = connect_db(self.path)
+        if 'pid' not in {row['name'] for row in conn.execute('PRAGMA table_info(logs)')}:
+            # Catalogs created before job pids were recorded
+            conn.execute('ALTER TABLE logs ADD COLUMN pid INTEGER')
+
+    @staticmethod
+    def parse_filename(filename):
+        """Return (job id, platform, kind, start time) from a log file name"""
+        job_id = filename[:-len('.gz')] if filename.endswith('.gz') else filename
+        job_id = job_id[:-len('.log')] if job_id.endswith('.log') else job_id
+        parts = job_id.split('_')
+        kind = 'prefill'
+        if parts[0] == 'auth':
+            kind = 'auth'
+            parts = parts[1:]
+            if parts and parts[0] == 'mfa':
+                kind = 'mfa'
+                parts = parts[1:]
+        platform = parts[0] if parts and parts[0] else 'unknown'
+        started = None
+        if len(parts) > 1 and parts[1].isdigit():
+            started = datetime.datetime.fromtimestamp(int(parts[1])).isoformat()
+        return job_id, platform, kind, started
+
+    def _upsert(self, conn, filename, **fields):
+        job_id, platform, kind, started = self.parse_filename(filename)
+        row = {'job_id': job_id, 'platform': platform, 'kind': kind, 'started': started}
+        row.update(fields)
+        columns = ', '.join(row)
+        conn.execute(f"INSERT INTO logs (filename, {columns}) VALUES (?{', ?' * len(row)}) "
+                     f"ON CONFLICT(filename) DO UPDATE SET "
+                     + ', '.join(f"{c} = excluded.{c}" for c in row),
+                     (filename, *row.values()))
+
+    def _changed(self):
+        with self._revision_lock:
+            self.revision += 1
+
+    def record_job(self, job):
+        """Insert or update the row for a job from the job registry"""
+        filename = os.path.basename(job['log_file'])
+        size = os.path.getsize(job['log_file']) if os.path.exists(job['log_file']) else 0
+        with connect_db(self.path) as conn:
+            self._upsert(conn, filename, job_id=job['id'], platform=job['platform'], kind=job['kind'],
+                         started=job['started'] or job['queued_at'], finished=job['finished'],
+                         size=size, status=job['status'], exit_code=job['exit_code'], pid=job['pid'])
+        self._changed()
+
+    def unfinished(self):
+        """Rows of jobs that were queued or running when they were last recorded"""
+        placeholders = ', '.join('?' * len(ACTIVE_JOB_STATUSES))
+        return [dict(row) for row in connect_db(self.path).execute(
+            f'SELECT * FROM logs WHERE status IN ({placeholders}) ORDER BY started', ACTIVE_JOB_STATUSES)]
+
+    def interrupt(self, filename):
+        """Mark a job whose dashboard process ended before it did as interrupted"""
+        with connect_db(self.path) as conn:
+            conn.execute("UPDATE logs SET status = 'interrupted', finished = ? WHERE filename = ?",
+                         (datetime.datetime.now().isoformat(), filename))
+        self._changed()
+
+    def record_file(self, log_path, exit_code=None):
+        """Record a log written outside the job registry, e.g. by an authentication attempt"""
+        st = os.stat(log_path)
+        with connect_db(self.path) as conn:
+            self._upsert(conn, os.path.basename(log_path),
+                         finished=datetime.datetime.fromtimestamp(st.st_mtime).isoformat(),
+                         size=st.st_size, exit_code=exit_code,
+                         status=None if exit_code is None else ('succeeded' if exit_code == 0 else 'failed'))
+        self._changed()
+
+    def rename(self, filename, new_filename, size):
+        with connect_db(self.path) as conn:
+            conn.execute('UPDATE logs SET filename = ?, size = ? WHERE filename = ?',
+                         (new_filename, size, filename))
+        self._changed()
+
+    def remove(self, filenames):
+        with connect_db(self.path) as conn:
+            conn.executemany('DELETE FROM logs WHERE filename = ?', [(f,) for f in filenames])
+        self._changed()
+
+    def entries(self):
+        """Every catalogued log, oldest first"""
+        self.reconcile()
+        return [dict(row) for row in connect_db(self.path).execute('SELECT * FROM logs ORDER BY started')]
+
+    def reconcile(self):
+        """Add log files the catalog hasn't seen and drop rows whose files are gone"""
+        try:
+            stamp = os.stat(self.log_dir).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if stamp == self._dir_stamp:
+            return
+        with self._lock:
+            conn = connect_db(self.path)
+            known = {row[0] for row in conn.execute('SELECT filename FROM logs')}
+            present = {f for f in os.listdir(self.log_dir) if is_log_filename(f)}
+            with conn:
+                conn.executemany('DELETE FROM logs WHERE filename = ?', [(f,) for f in known - present])
+                for filename in present - known:
+                    st = os.stat(os.path.join(self.log_dir, filename))
+                    mtime = datetime.datetime.fromtimestamp(st.st_mtime).isoformat()
+                    started = self.parse_filename(filename)[3] or mtime
+                    self._upsert(conn, filename, started=started, finished=mtime, size=st.st_size)
+            if known != present:
+                self._changed()
+            self._dir_stamp = stamp
+
+    def query(self, platform=None, kind=None, since=None, until=None, page=1, per_page=LOG_LIST_PAGE_SIZE):
+        """Return (rows, total) for one page of logs, newest first"""
+        self.reconcile()
+        where, args = [], []
+        if platform:
+            where.append('platform = ?')
+            args.append(platform)
+        if kind:
+            where.append('kind = ?')
+            args.append(kind)
+        if since:
+            where.append('started >= ?')
+            args.append(since)
+        if until:
+            where.append('started < ?')
+            args.append(until)
+        clause = f"WHERE {' AND '.join(where)}" if where else ''
+        conn = connect_db(self.path)
+        total = conn.execute(f'SELECT COUNT(*) FROM logs {clause}', args).fetchone()[0]
+        rows = conn.execute(f'SELECT * FROM logs {clause} ORDER BY started DESC LIMIT ? OFFSET ?',
+                            args + [per_page, (page - 1) * per_page]).fetchall()
+        return [dict(row) for row in rows], total
+
+
+log_catalog = LogCatalog(HISTORY_DB_FILE, LOG_DIR)
+
+
+class PeriodicTask:
+    """Base for background work repeated every `interval` seconds on one daemon thread.
+
+    Subclasses implement run_once(), or tick() when a pass does more; errors
+    are logged as "Error <activity>" and the next pass runs as usual.
+    """
+
+    interval = 60
+    activity = 'running a background task'
+    _thread = None
+
+    def start(self):
+        if self._thread:
+            return
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while True:
+            try:
+                self.tick()
+            except Exception as e:
+                logging.error(f"Error {self.activity}: {str(e)}")
+            time.sleep(self.interval)
+
+    def tick(self):
+        self.run_once()
+
+
+class LogRetention(PeriodicTask):
+    """Background retention for LOG_DIR: gzip finished logs, then delete by age, count and total size.
+
+    Logs of queued or running jobs are never touched. The policy comes from
+    LOG_RETENTION, overridden per key by "log_retention" in config.json.
+    """
+
+    interval = LOG_RETENTION_INTERVAL
+    activity = 'applying log retention'
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def policy(self):
+        policy = dict(LOG_RETENTION)
+        policy.update(config_store.view().get('log_retention', {}))
+        return policy
+
+    def run_once(self):
+        policy = self.policy()
+        now = datetime.datetime.now()
+        active = {os.path.basename(j['log_file']) for j in job_manager.jobs(ACTIVE_JOB_STATUSES)}
+        entries = [e for e in self.catalog.entries()
+                   if e['filename'] not in active and os.path.exists(os.path.join(LOG_DIR, e['filename']))]
+
+        compress_before = (now - datetime.timedelta(days=policy['compress_after_days'])).isoformat()
+        for entry in entries:
+            if entry['filename'].endswith('.log') and (entry['finished'] or entry['started'] or '') < compress_before:
+                self._compress(entry)
+
+        doomed = set()
+        if policy['max_age_days']:
+            cutoff = (now - datetime.timedelta(days=policy['max_age_days'])).isoformat()
+            doomed.update(e['filename'] for e in entries if (e['started'] or '') < cutoff)
+            job_metrics.prune(cutoff)
+            library_snapshots.prune(cutoff)
+        if policy['max_files_per_platform']:
+            by_platform = collections.defaultdict(list)
+            for entry in entries:
+                by_platform[entry['platform']].append(entry['filename'])
+            for filenames in by_platform.values():
+                doomed.update(filenames[:-policy['max_files_per_platform']])
+        if policy['max_total_mb']:
+            # Entries are oldest first, so drop from the front until the rest fits
+            total = sum(e['size'] or 0 for e in entries if e['filename'] not in doomed)
+            limit = policy['max_total_mb'] * 1024 * 1024
+            for entry in entries:
+                if total <= limit:
+                    break
+                if entry['filename'] not in doomed:
+                    doomed.add(entry['filename'])
+                    total -= entry['size'] or 0
+
+        for filename in doomed:
+            try:
+                os.remove(os.path.join(LOG_DIR, filename))
+            except FileNotFoundError:
+                pass
+        if doomed:
+            self.catalog.remove(doomed)
+            logging.info(f"Log retention removed {len(doomed)} log files")
+
+    def _compress(self, entry):
+        log_path = os.path.join(LOG_DIR, entry['filename'])
+        gz_path = log_path + '.gz'
+        tmp_path = gz_path + '.tmp'
+        try:
+            with open(log_path, 'rb') as src, gzip.open(tmp_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            st = os.stat(log_path)
+            os.utime(tmp_path, (st.st_atime, st.st_mtime))
+            os.replace(tmp_path, gz_path)
+            os.remove(log_path)
+        except Exception as e:
+            logging.error(f"Error compressing {log_path}: {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        entry['filename'] = os.path.basename(gz_path)
+        entry['size'] = os.path.getsize(gz_path)
+        self.catalog.rename(os.path.basename(log_path), entry['filename'], entry['size'])
+
+
+log_retention = LogRetention(log_catalog)
+
+
+class AccessLogIngester(PeriodicTask):
+    """Incremental reader of the lancache nginx access log ("cachelog" format).
+
+    Each run reads only the lines appended since the last one, in a single
+    pass. Hits, misses and bytes are summed per time bucket, cache identifier
+    and depot (Steam) or host, in a dict that is flushed to SQLite, together
+    with the read offset, whenever it reaches ACCESS_LOG_BATCH_KEYS entries.
+    Memory therefore stays constant however large the log is. When the log is
+    renamed away by rotation, the rest of the rotated file (<log>.1) is read
+    first; a truncated log or a different first line restarts at offset 0.
+    """
+
+    LINE = re.compile(rb'^\[(?P<cache>[^\]]*)\] .*? \[(?P<time>\d{2}/\w{3}/\d{4}:\d{2}:\d{2}:\d{2} [+-]\d{4})\] '
+                      rb'"(?P<request>[^"]*)" (?P<status>\d{3}) (?P<bytes>\d+|-) "[^"]*" "[^"]*" '
+                      rb'"(?P<cache_status>[^"]*)" "(?P<host>[^"]*)"')
+    DEPOT = re.compile(rb'/depot/(\d+)/')
+    HIT_STATUSES = (b'HIT', b'REVALIDATED')
+    MISS_STATUSES = (b'MISS', b'EXPIRED', b'STALE', b'UPDATING', b'BYPASS')
+    MAX_LINE = 64 * 1024
+    interval = ACCESS_LOG_INTERVAL
+    activity = 'ingesting the lancache access log'
+
+    def __init__(self, path):
+        self.path = path
+        self._run_lock = threading.Lock()
+        self._minutes = {}  # "dd/Mon/yyyy:HH:MM +zzzz" -> epoch of that minute
+        self.revision = 0   # bumped by every flush
+        connect_db(self.path).executescript('''
+            CREATE TABLE IF NOT EXISTS access_log_state (
+                path TEXT PRIMARY KEY,
+                inode INTEGER,
+                offset INTEGER,
+                head TEXT
+            );
+            CREATE TABLE IF NOT EXISTS cache_stats (
+                bucket INTEGER NOT NULL,
+                cache TEXT NOT NULL,
+                depot TEXT NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                misses INTEGER NOT NULL DEFAULT 0,
+                hit_bytes INTEGER NOT NULL DEFAULT 0,
+                miss_bytes INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (bucket, cache, depot)
+            );
+        ''')
+
+    def log_path(self):
+        return config_store.view().get('lancache_access_log', ACCESS_LOG_FILE)
+
+    def tick(self):
+        self.run_once()
+        self.prune()
+
+    @staticmethod
+    def _head(log_path):
+        """Hash of the log's first line, or '' until it has one"""
+        with open(log_path, 'rb') as f:
+            line = f.readline(AccessLogIngester.MAX_LINE)
+        return hashlib.sha1(line).hexdigest() if line.endswith(b'\n') else ''
+
+    def run_once(self):
+        """Ingest everything appended since the last run; returns the number of lines read"""
+        log_path = self.log_path()
+        with self._run_lock:
+            try:
+                st = os.stat(log_path)
+                head = self._head(log_path)
+            except FileNotFoundError:
+                return 0
+            row = connect_db(self.path).execute('SELECT inode, offset, head FROM access_log_state WHERE path = ?',
+                                          (log_path,)).fetchone()
+            lines = 0
+            offset = 0
+            if row and row['inode'] != st.st_ino:
+                rotated = log_path + '.1'
+                try:
+                    if os.stat(rotated).st_ino == row['inode']:
+                        lines += self._ingest(log_path, rotated, row['inode'], row['head'], row['offset'])
+                except FileNotFoundError:
+                    pass
+            elif row and (not row['head'] or row['head'] == head) and st.st_size >= row['offset']:
+                offset = row['offset']
+            return lines + self._ingest(log_path, log_path, st.st_ino, head, offset)
+
+    def _ingest(self, log_path, read_path, inode, head, offset):
+        counts = {}  # (bucket, cache, depot) -> [hits, misses, hit_bytes, miss_bytes]
+        lines = skipped = 0
+        with open(read_path, 'rb') as f:
+            f.seek(offset)
+            pending = b''
+            while True:
+                chunk = f.read(LOG_STREAM_CHUNK)
+                if not chunk:
+                    break
+                data = pending + chunk
+                end = data.rfind(b'\n')
+                if end < 0:
+                    # No complete line yet; an overlong one is dropped rather than buffered
+                    pending = data if len(data) <= self.MAX_LINE else b''
+                    continue
+                pending = data[end + 1:]
+                for line in data[:end].split(b'\n'):
+                    lines += 1
+                    if not self._add(counts, line):
+                        skipped += 1
+                if len(counts) >= ACCESS_LOG_BATCH_KEYS:
+                    self._flush(counts, log_path, inode, head, f.tell() - len(pending))
+                    counts = {}
+            self._flush(counts, log_path, inode, head, f.tell() - len(pending))
+        metrics.inc('dashboard_access_log_lines_total', lines - skipped, result='parsed')
+        metrics.inc('dashboard_access_log_lines_total', skipped, result='skipped')
+        return lines
+
+    def _add(self, counts, line):
+        match = self.LINE.match(line)
+        if not match:
+            return False
+        cache_status = match.group('cache_status')
+        if cache_status in self.HIT_STATUSES:
+            hit = True
+        elif cache_status in self.MISS_STATUSES:
+            hit = False
+        else:
+            # Errors and uncacheable requests say nothing about the cache
+            return True
+        bucket = self._bucket(match.group('time'))
+        if bucket is None:
+            return False
+        cache = match.group('cache').decode('utf-8', errors='replace')
+        depot = self.DEPOT.search(match.group('request')) if cache == 'steam' else None
+        depot = (depot.group(1) if depot else match.group('host')).decode('utf-8', errors='replace')
+        size = int(match.group('bytes')) if match.group('bytes') != b'-' else 0
+        entry = counts.get((bucket, cache, depot))
+        if entry is None:
+            entry = counts[(bucket, cache, depot)] = [0, 0, 0, 0]
+        if hit:
+            entry[0] += 1
+            entry[2] += size
+        else:
+            entry[1] += 1
+            entry[3] += size
+        return True
+
+    def _bucket(self, timestamp):
+        # strptime is slow, so parse each minute once; timestamps within a minute share it
+        minute = timestamp[:17] + timestamp[20:]
+        epoch = self._minutes.get(minute)
+        if epoch is None:
+            try:
+                epoch = int(datetime.datetime.strptime(minute.decode('ascii'), '%d/%b/%Y:%H:%M %z').timestamp())
+            except ValueError:
+                return None
+            if len(self._minutes) > 4096:
+                self._minutes.clear()
+            self._minutes[minute] = epoch
+        return epoch - epoch % ACCESS_LOG_BUCKET_SECONDS
+
+    def _flush(self, counts, log_path, inode, head, offset):
+        with connect_db(self.path) as conn:
+            conn.executemany(
+                'INSERT INTO cache_stats (bucket, cache, depot, hits, misses, hit_bytes, miss_bytes) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(bucket, cache, depot) DO UPDATE SET '
+                'hits = hits + excluded.hits, misses = misses + excluded.misses, '
+                'hit_bytes = hit_bytes + excluded.hit_bytes, miss_bytes = miss_bytes + excluded.miss_bytes',
+                [key + tuple(values) for key, values in counts.items()])
+            # Saved in the same transaction, so a crash never counts lines twice
+            conn.execute('INSERT OR REPLACE INTO access_log_state (path, inode, offset, head) VALUES (?, ?, ?, ?)',
+                         (log_path, inode, offset, head))
+        if counts:
+            self.revision += 1
+
+    def prune(self):
+        cutoff = int(time.time()) - ACCESS_LOG_RETENTION_DAYS * 86400
+        with connect_db(self.path) as conn:
+            conn.execute('DELETE FROM cache_stats WHERE bucket < ?', (cutoff,))
+
+    def summary(self, hours=24):
+        """Hits, misses, bytes and byte hit ratio per platform over the last hours"""
+        since = int(time.time()) - hours * 3600
+        rows = connect_db(self.path).execute(
+            'SELECT cache, SUM(hits) AS hits, SUM(misses) AS misses, SUM(hit_bytes) AS hit_bytes, '
+            'SUM(miss_bytes) AS miss_bytes FROM cache_stats WHERE bucket >= ? GROUP BY cache '
+            'ORDER BY SUM(hit_bytes) + SUM(miss_bytes) DESC', (since - since % ACCESS_LOG_BUCKET_SECONDS,))
+        return [self._with_ratio(dict(row, platform=CACHE_PLATFORMS.get(row['cache'], row['cache'])))
+                for row in rows]
+
+    def top_depots(self, hours=24, limit=10):
+        """Depots (or hosts) that served the most bytes over the last hours"""
+        since = int(time.time()) - hours * 3600
+        rows = connect_db(self.path).execute(
+            'SELECT cache, depot, SUM(hits) AS hits, SUM(misses) AS misses, SUM(hit_bytes) AS hit_bytes, '
+            'SUM(miss_bytes) AS miss_bytes FROM cache_stats WHERE bucket >= ? GROUP BY cache, depot '
+            'ORDER BY SUM(hit_bytes) + SUM(miss_bytes) DESC LIMIT ?',
+            (since - since % ACCESS_LOG_BUCKET_SECONDS, limit))
+        return [self._with_ratio(dict(row, platform=CACHE_PLATFORMS.get(row['cache'], row['cache'])))
+                for row in rows]
+
+    @staticmethod
+    def _with_ratio(row):
+        total = (row['hit_bytes'] or 0) + (row['miss_bytes'] or 0)
+        row['hit_ratio'] = round(row['hit_bytes'] / total, 4) if total else None
+        return row
+
+
+access_log = AccessLogIngester(HISTORY_DB_FILE)
+
+
+class CacheUsageScanner(PeriodicTask):
+    """Incremental disk usage index of the lancache cache directory, with a fill forecast.
+
+    nginx renames every cached file into place, so a directory's mtime changes
+    whenever its files do. Each pass stats every directory but lists and stats
+    files only in those whose mtime moved since the last pass, instead of a
+    full du walk. Per-directory totals are kept in memory and in
+    history.db, and the cache total is sampled on each pass so the growth
+    rate can be projected forward.
+    """
+
+    interval = CACHE_SCAN_INTERVAL
+    activity = 'scanning the lancache cache directory'
+
+    def __init__(self, path):
+        self.path = path
+        self._run_lock = threading.Lock()
+        self._dirs = None          # absolute path -> (mtime_ns, bytes, files, subdirectory names)
+        self._totals = None        # result of the last pass
+        self.revision = 0          # bumped whenever a pass changes the totals
+        connect_db(self.path).executescript('''
+            CREATE TABLE IF NOT EXISTS cache_dirs (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER,
+                bytes INTEGER NOT NULL,
+                files INTEGER NOT NULL,
+                subdirs TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS cache_usage_samples (
+                ts INTEGER NOT NULL,
+                bytes INTEGER NOT NULL,
+                files INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_cache_usage_samples_ts ON cache_usage_samples (ts);
+        ''')
+
+    def cache_dir(self):
+        return config_store.view().get('lancache_cache_dir', CACHE_DIR)
+
+    def _load(self, root):
+        rows = connect_db(self.path).execute(
+            "SELECT path, mtime_ns, bytes, files, subdirs FROM cache_dirs WHERE path = ? OR path LIKE ? ESCAPE '\\'",
+            (root, root.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '/%'))
+        return {r['path']: (r['mtime_ns'], r['bytes'], r['files'], tuple(filter(None, r['subdirs'].split('/'))))
+                for r in rows}
+
+    def run_once(self):
+        """Bring the index up to date; returns the totals, or None if the cache directory is missing"""
+        root = os.path.abspath(self.cache_dir())
+        if not os.path.isdir(root):
+            return None
+        with self._run_lock:
+            if self._dirs is None or (self._totals and self._totals['root'] != root):
+                self._dirs = self._load(root)
+            # A directory changed within the mtime granularity of its last scan could change
+            # again unnoticed, so it is stored without an mtime and listed again next pass
+            horizon = time.time_ns() - CACHE_MTIME_GRANULARITY_NS
+            seen = {}
+            changed = []
+            stack = [root]
+            while stack:
+                path = stack.pop()
+                try:
+                    mtime = os.stat(path).st_mtime_ns
+                except FileNotFoundError:
+                    continue
+                entry = self._dirs.get(path)
+                if entry is None or entry[0] != mtime:
+                    entry = self._scan_dir(path, mtime if mtime < horizon else None)
+                    changed.append(path)
+                seen[path] = entry
+                stack.extend(os.path.join(path, name) for name in entry[3])
+            removed = [path for path in self._dirs if path not in seen]
+            self._dirs = seen
+
+            buckets = collections.Counter()
+            files = 0
+            for path, entry in seen.items():
+                rel = os.path.relpath(path, root)
+                buckets[rel.split(os.sep, 1)[0] if rel != '.' else '.'] += entry[1]
+                files += entry[2]
+            now = int(time.time())
+            with connect_db(self.path) as conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO cache_dirs (path, mtime_ns, bytes, files, subdirs) VALUES (?, ?, ?, ?, ?)',
+                    [(path,) + seen[path][:3] + ('/'.join(seen[path][3]),) for path in changed])
+                conn.executemany('DELETE FROM cache_dirs WHERE path = ?', [(path,) for path in removed])
+                conn.execute('INSERT INTO cache_usage_samples (ts, bytes, files) VALUES (?, ?, ?)',
+                             (now, sum(buckets.values()), files))
+                conn.execute('DELETE FROM cache_usage_samples WHERE ts < ?', (now - CACHE_USAGE_HISTORY_DAYS * 86400,))
+            metrics.inc('dashboard_cache_scan_dirs_total', len(changed), result='rescanned')
+            metrics.inc('dashboard_cache_scan_dirs_total', len(seen) - len(changed), result='unchanged')
+
+            totals = {
+                'root': root,
+                'bytes': sum(buckets.values()),
+                'files': files,
+                'buckets': {name: size for name, size in buckets.most_common() if size or name != '.'},
+                'directories': len(seen),
+                'rescanned': len(changed),
+                'scanned': datetime.datetime.now().isoformat()
+            }
+            if not self._totals or (totals['bytes'], totals['files']) != (self._totals['bytes'], self._totals['files']):
+                self.revision += 1
+            self._totals = totals
+            return totals
+
+    @staticmethod
+    def _scan_dir(path, mtime):
+        size = files = 0
+        subdirs = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                        elif entry.is_file(follow_symlinks=False):
+                            # Allocated blocks, as du counts them
+                            size += entry.stat(follow_symlinks=False).st_blocks * 512
+                            files += 1
+                    except FileNotFoundError:
+                        pass
+        except (FileNotFoundError, PermissionError) as e:
+            logging.error(f"Error listing {path}: {str(e)}")
+            mtime = None
+        return (mtime, size, files, tuple(subdirs))
+
+    def growth_per_day(self):
+        """Cache growth in bytes per day over the last CACHE_GROWTH_DAYS, or None without enough history"""
+        since = int(time.time()) - CACHE_GROWTH_DAYS * 86400
+        conn = connect_db(self.path)
+        first = conn.execute('SELECT ts, bytes FROM cache_usage_samples WHERE ts >= ? ORDER BY ts LIMIT 1',
+                             (since,)).fetchone()
+        last = conn.execute('SELECT ts, bytes FROM cache_usage_samples ORDER BY ts DESC LIMIT 1').fetchone()
+        if not first or last['ts'] - first['ts'] < 3600:
+            return None
+        return (last['bytes'] - first['bytes']) * 86400 / (last['ts'] - first['ts'])
+
+    def forecast(self):
+        """Free space, growth and projected fill of the cache volume, including the selected games"""
+        totals = self._totals
+        if totals is None:
+            return None
+        try:
+            disk = shutil.disk_usage(totals['root'])
+        except OSError:
+            return None
+        config = config_store.view()
+        free = disk.free
+        capacity = disk.total
+        # nginx evicts at lancache's CACHE_DISK_SIZE, which may be less than the volume
+        limit_gb = config.get('lancache_cache_size_gb')
+        if limit_gb:
+            capacity = min(capacity, int(limit_gb * 1024 ** 3))
+            free = min(free, max(capacity - totals['bytes'], 0))
+
+        selected = {}
+        for platform in PLATFORMS:
+            # Sizes from the last library snapshot, which survives restarts; the forecast never queries the tools
+            sizes = library_snapshots.sizes(platform)
+            games = config['games'].get(platform, [])
+            known = [sizes[g['id']] for g in games if sizes.get(g['id'])]
+            selected[platform] = {'games': len(games), 'bytes': sum(known), 'unknown_size': len(games) - len(known)}
+        selected_bytes = sum(s['bytes'] for s in selected.values())
+        unknown_size = sum(s['unknown_size'] for s in selected.values())
+
+        growth = self.growth_per_day()
+        return {
+            'cache_bytes': totals['bytes'],
+            'cache_files': totals['files'],
+            'capacity_bytes': capacity,
+            'free_bytes': free,
+            'scanned': totals['scanned'],
+            'growth_per_day': int(growth) if growth is not None else None,
+            'days_until_full': round(free / growth, 1) if growth and growth > 0 else None,
+            'selected': selected,
+            'selected_bytes': selected_bytes,
+            'unknown_size': unknown_size,
+            # Worst case: none of the selected games are cached yet. Unknown (None) while
+            # games of unknown size could still push the selection past the free space.
+            'fits_selected': False if selected_bytes > free else (None if unknown_size else True),
+            'free_after_selected': free - selected_bytes
+        }
+
+    def buckets(self):
+        return dict(self._totals['buckets']) if self._totals else {}
+
+    def collect(self):
+        return {(): self._totals['bytes']} if self._totals else {}
+
+
+cache_usage = CacheUsageScanner(HISTORY_DB_FILE)
+
+
+@app.route('/jobs/<job_id>/progress')
+@login_required
+def job_progress(job_id):
+    """Progress time series and per-app results of a prefill job"""
+    job = job_manager.get(job_id)
+    return jsonify({
+        'job_id': job_id,
+        'status': job['status'] if job else None,
+        'progress': job['progress'] if job else None,
+        'samples': job_metrics.samples(job_id),
+        'apps': job_metrics.apps(job_id)
+    })
+
 @app.route('/logs')
 @login_required
 def view_logs():
-    logs = []
-    if os.path.exists(LOG_DIR):
-        log_files = [f for f in os.listdir(LOG_DIR) if f.endswith('.log')]
-        log_files.sort(reverse=True)  # Most recent first
-        for log_file in log_files[:10]:  # Show 10 most recent logs
-            log_path = os.path.join(LOG_DIR, log_file)
-            platform = log_file.split('_')[0] if '_' in log_file else 'unknown'
-            timestamp = os.path.getmtime(log_path)
-            logs.append({
-                'filename': log_file,
-                'platform': platform,
-                'time': datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S'),
-                'size': os.path.getsize(log_path)
-            })
+    filters, page, logs, total = list_logs(request.args)
+    pages = max((total + LOG_LIST_PAGE_SIZE - 1) // LOG_LIST_PAGE_SIZE, 1)
+    return render_template('logs.html', logs=logs, filters=filters, page=page, pages=pages, total=total)
+
+def list_logs(args):
+    """Return (filters, page, logs, total) for the log list filters in request args"""
+    filters = {
+        'platform': args.get('platform') or None,
+        'kind': args.get('kind') or None,
+        'since': args.get('since') or None,
+        'until': args.get('until') or None
+    }
+    page = max(args.get('page', 1, type=int), 1)
+    
+    until = filters['until']
+    if until:
+        # The end date is inclusive
+        try:
+            until = (datetime.date.fromisoformat(until) + datetime.timedelta(days=1)).isoformat()
+        except ValueError:
+            until = None
+    rows, total = log_catalog.query(platform=filters['platform'], kind=filters['kind'],
+                                    since=filters['since'], until=until, page=page)
     
-    return render_template('logs.html', logs=logs)
+    logs = []
+    for row in rows:
+        size = row['size'] or 0
+        if row['status'] == 'running':
+            # Still growing, so the recorded size is out of date
+            log_path = os.path.join(LOG_DIR, row['filename'])
+            size = os.path.getsize(log_path) if os.path.exists(log_path) else size
+        logs.append({
+            'filename': row['filename'],
+            'platform': row['platform'],
+            'kind': row['kind'],
+            'status': row['status'],
+            'exit_code': row['exit_code'],
+            'time': row['started'].replace('T', ' ')[:19] if row['started'] else '',
+            'size': size
+        })
+    return filters, page, logs, total
+
+def is_log_filename(filename):
+    return filename.endswith('.log') or filename.endswith('.log.gz')
 
 @app.route('/logs/<filename>')
 @login_required
 def view_log_file(filename):
     log_path = os.path.join(LOG_DIR, filename)
-    if not os.path.exists(log_path) or not filename.endswith('.log'):
+    if not os.path.exists(log_path) or not is_log_filename(filename):
         flash("Log file not found")
         return redirect(url_for('view_logs'))
     
     try:
-        with open(log_path, 'r') as f:
-            content = f.read()
-        return render_template('log_detail.html', filename=filename, content=content)
+        lines = min(max(int(request.args.get('lines', LOG_PAGE_LINES)), 1), LOG_PAGE_MAX_LINES)
+        start = request.args.get('start', type=int)
+        end = request.args.get('end', type=int)
+        page = read_log_page(log_path, start=start, end=end, lines=lines)
     except Exception as e:
         flash(f"Error reading log: {str(e)}")
         return redirect(url_for('view_logs'))
+    
+    # Live job at the tail: the page follows the log over the stream endpoint
+    job = job_manager.job_for_log(filename)
+    live = bool(job and job['status'] in ACTIVE_JOB_STATUSES and page['end'] == page['size'])
+    return render_template('log_detail.html', filename=filename, content=page['text'], page=page,
+                           lines=lines, live=live, stream_offset=page['end'])
+
+def read_log_page(log_path, start=None, end=None, lines=LOG_PAGE_LINES):
+    """Read a page of whole lines by byte range using mmap.
+
+    With start, the page runs forward from that byte; otherwise it runs
+    backwards from end (default EOF), so the default page is the log's tail.
+    """
+    if log_path.endswith('.gz'):
+        return read_gzip_log_page(log_path, start=start, end=end, lines=lines)
+    
+    size = os.path.getsize(log_path)
+    if size == 0:
+        return {'text': '', 'start': 0, 'end': 0, 'size': 0}
+    
+    with open(log_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if start is not None:
+            start = min(max(start, 0), size)
+            end = start
+            for _ in range(lines):
+                end = mm.find(b'\n', end, start + LOG_PAGE_MAX_BYTES)
+                if end < 0:
+                    end = min(start + LOG_PAGE_MAX_BYTES, size)
+                    break
+                end += 1
+        else:
+            end = size if end is None else min(max(end, 0), size)
+            floor = max(end - LOG_PAGE_MAX_BYTES, 0)
+            # A trailing newline ends the last line rather than starting an empty one
+            start = end - 1 if end > 0 and mm[end - 1:end] == b'\n' else end
+            for _ in range(lines):
+                start = mm.rfind(b'\n', floor, start)
+                if start < 0:
+                    start = floor - 1
+                    break
+            start += 1
+        text = mm[start:end].decode('utf-8', errors='replace')
+    return {'text': text, 'start': start, 'end': end, 'size': size}
+
+def gzip_uncompressed_size(log_path):
+    """Uncompressed size from the gzip trailer (modulo 4 GiB, as stored by the format)"""
+    with open(log_path, 'rb') as f:
+        f.seek(-4, os.SEEK_END)
+        return int.from_bytes(f.read(4), 'little')
+
+def read_gzip_log_page(log_path, start=None, end=None, lines=LOG_PAGE_LINES):
+    """Same as read_log_page for a gzip-compressed log, decompressing as a stream.
+
+    Offsets are positions in the decompressed text. Only the page being built
+    is held in memory, so tail pages cost one pass but no more than a page.
+    """
+    size = gzip_uncompressed_size(log_path)
+    with gzip.open(log_path, 'rb') as f:
+        window = collections.deque()
+        total = 0
+        if start is not None:
+            f.seek(min(max(start, 0), size))
+            start = f.tell()
+            while len(window) < lines and total < LOG_PAGE_MAX_BYTES:
+                line = f.readline(LOG_PAGE_MAX_BYTES - total)
+                if not line:
+                    break
+                window.append(line)
+                total += len(line)
+            end = start + total
+        else:
+            end = size if end is None else min(max(end, 0), size)
+            offset = 0
+            while offset < end:
+                line = f.readline(min(LOG_PAGE_MAX_BYTES, end - offset))
+                if not line:
+                    break
+                window.append(line)
+                total += len(line)
+                offset += len(line)
+                while len(window) > lines or total > LOG_PAGE_MAX_BYTES:
+                    total -= len(window.popleft())
+            end = offset
+            start = end - total
+    return {'text': b''.join(window).decode('utf-8', errors='replace'), 'start': start, 'end': end,
+            'size': max(size, end)}
+
+@app.route('/logs/<filename>/stream')
+@login_required
+def stream_log_file(filename):
+    """Server-Sent Events feed of a log file's new bytes, starting at ?offset= or Last-Event-ID"""
+    log_path = os.path.join(LOG_DIR, filename)
+    if not os.path.exists(log_path) or not filename.endswith('.log'):
+        return jsonify({'error': 'Log file not found'}), 404
+    
+    try:
+        offset = int(request.headers.get('Last-Event-ID') or request.args.get('offset', 0))
+    except ValueError:
+        offset = 0
+    
+    return open_stream(follow_log, filename, log_path, max(offset, 0))
+
+def follow_log(filename, log_path, offset):
+    """Yield SSE events for bytes appended to a log, in bounded chunks, until its job ends.
+
+    Like /events, a stream ends after STREAM_MAX_SECONDS; the browser reconnects
+    and resumes from the last offset it received (Last-Event-ID).
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    idle_since = time.monotonic()
+    deadline = idle_since + STREAM_MAX_SECONDS
+    yield "retry: 3000\n\n"
+    with open(log_path, 'rb') as f:
+        f.seek(min(offset, os.path.getsize(log_path)))
+        while time.monotonic() < deadline:
+            chunk = f.read(LOG_STREAM_CHUNK)
+            if chunk:
+                offset = f.tell()
+                idle_since = time.monotonic()
+                yield f"id: {offset}\ndata: {json.dumps({'offset': offset, 'text': decoder.decode(chunk)})}\n\n"
+                continue
+            
+            job = job_manager.job_for_log(filename)
+            if not job or job['status'] not in ACTIVE_JOB_STATUSES:
+                # Drain anything written between the last read and the job finishing
+                if os.fstat(f.fileno()).st_size > f.tell():
+                    continue
+                yield f"event: end\ndata: {json.dumps({'offset': offset, 'status': job['status'] if job else None})}\n\n"
+                return
+            
+            if time.monotonic() - idle_since > 15:
+                yield ": keepalive\n\n"
+                idle_since = time.monotonic()
+            time.sleep(LOG_STREAM_POLL)
+
+@app.route('/events')
+@login_required
+def event_stream():
+    """Server-Sent Events feed of job, schedule and config changes for the dashboard"""
+    try:
+        last_id = int(request.headers.get('Last-Event-ID', 0))
+    except ValueError:
+        last_id = 0
+    return open_stream(follow_events, last_id)
+
+_open_streams = 0
+_open_streams_lock = threading.Lock()
+
+def open_stream(follow, *args):
+    """SSE response for follow(*args), within the server threads all open streams may hold.
+
+    Over the budget the answer is 204, which tells EventSource not to
+    reconnect; the dashboard then polls /api/v1/status instead.
+    """
+    global _open_streams
+    with _open_streams_lock:
+        if _open_streams >= config_store.view().get('stream_max_clients', STREAM_MAX_CLIENTS):
+            return Response(status=204)
+        _open_streams += 1
+    response = Response(follow(*args), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.call_on_close(release_stream)
+    return response
+
+def release_stream():
+    global _open_streams
+    with _open_streams_lock:
+        _open_streams -= 1
+
+def follow_events(last_id):
+    """Yield SSE events from the event bus, then end so the browser reconnects on a fresh thread"""
+    yield "retry: 3000\n\n"
+    deadline = time.monotonic() + STREAM_MAX_SECONDS
+    while time.monotonic() < deadline:
+        events, last_id = event_bus.since(last_id, timeout=15)
+        if not events:
+            yield ": keepalive\n\n"
+        for event_id, event_type, data in events:
+            yield f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n"
 
 @app.route('/settings', methods=['GET', 'POST'])
 @login_required
 def settings():
-    config = load_config()
+    config = config_store.view()
     message = None
+    new_token = None
     
     if request.method == 'POST':
         if 'update_password' in request.form:
-            current = request.form.get('current_password')
+            current = request.form.get('current_password', '')
             new = request.form.get('new_password')
             confirm = request.form.get('confirm_password')
             
-            if current == config['password']:
+            if auth.throttle(request.remote_addr):
+                message = "Too many attempts, try again later"
+            elif auth.verify_password(current):
                 if new and new == confirm:
-                    config['password'] = new
-                    save_config(config)
+                    auth.set_password(new)
+                    # Other sessions are signed out; this one stays
+                    session['auth'] = auth.session_marker()
                     message = "Password updated successfully"
                 else:
                     message = "New passwords don't match"
             else:
                 message = "Current password is incorrect"
         
+        elif 'create_api_token' in request.form:
+            name = request.form.get('token_name', '').strip()
+            if name:
+                new_token = auth.create_token(name)
+                message = f"Created API token \"{name}\""
+            else:
+                message = "Enter a name for the API token"
+        
+        elif 'revoke_api_token' in request.form:
+            if auth.revoke_token(request.form.get('token_id')):
+                message = "Revoked API token"
+        
         elif 'update_tool_path' in request.form:
             platform = request.form.get('platform')
             path = request.form.get('tool_path')
             
             if platform in config['prefill_tools'] and path:
-                config['prefill_tools'][platform] = path
-                save_config(config)
+                config_store.update(lambda config: config['prefill_tools'].update({platform: path}))
+                tool_cache.invalidate(platform)
                 message = f"Updated {platform} tool path"
+        
+        elif 'update_auto_select' in request.form:
+            platforms = [p for p in PLATFORMS if request.form.get(f"auto_select_{p}")]
+            config_store.update(lambda config: config.update(auto_select_new_games=platforms))
+            message = "Updated automatic selection of new games"
     
     return render_template('settings.html', 
-                          config=config,
-                          message=message)
+                          config=config_store.view(),
+                          message=message,
+                          new_token=new_token)
 
 # Helper functions
 def get_active_jobs():
-    """Check for any running prefill jobs"""
-    active = []
-    try:
-        # Simple check using process name, adapt to your environment
-        output = subprocess.check_output(['ps', 'aux'], text=True)
-        for tool in ['steamprefill', 'epicprefill', 'battlenetprefill']:
-            if tool in output:
-                platform = tool.replace('prefill', '')
-                active.append({
-                    'platform': platform,
-                    'started': 'Unknown'  # Could parse from ps output if needed
-                })
-    except Exception as e:
-        logging.error(f"Error checking active jobs: {str(e)}")
-    return active
+    """Running and queued prefill jobs from the job registry"""
+    return [{
+        'id': job['id'],
+        'platform': job['platform'],
+        'started': (job['started'] or job['queued_at']).replace('T', ' ')[:16],
+        'status': job['status'],
+        'progress': job['progress'],
+        'bandwidth_mbps': job['bandwidth_mbps']
+    } for job in job_manager.jobs(ACTIVE_JOB_STATUSES)]
 
 def get_upcoming_schedules(schedules):
     """Get schedules that are coming up soon"""
@@ -855,20 +4100,8 @@ def get_upcoming_schedules(schedules):
         if not schedule['enabled']:
             continue
         
-        # Simple schedule check - could be more sophisticated
-        day_map = {'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3, 
-                 'friday': 4, 'saturday': 5, 'sunday': 6}
-        day_num = day_map.get(schedule['day'].lower(), -1)
-        
-        if day_num >= 0:
-            days_ahead = (day_num - now.weekday()) % 7
-            if days_ahead == 0 and now.strftime('%H:%M') > schedule['time']:
-                days_ahead = 7  # Next week
-                
-            sched_time = datetime.datetime.strptime(schedule['time'], '%H:%M')
-            next_run = now.replace(hour=sched_time.hour, minute=sched_time.minute, second=0) + \
-                      datetime.timedelta(days=days_ahead)
-            
+        next_run = next_schedule_run(schedule, now)
+        if next_run:
             upcoming.append({
                 'platform': schedule['platform'],
                 'next_run': next_run.strftime('%Y-%m-%d %H:%M'),
@@ -879,5 +4112,191 @@ def get_upcoming_schedules(schedules):
     upcoming.sort(key=lambda x: x['next_run'])
     return upcoming[:5]  # Return 5 most imminent
 
+# JSON API
+# Each response has a strong ETag built from the revisions of the state behind
+# it, so polling clients get 304 Not Modified while nothing changes.
+API_EPOCH = secrets.token_hex(8)  # job and log revisions start over with the process
+API_JOB_FIELDS = ('id', 'platform', 'kind', 'status', 'queued_at', 'started', 'finished',
+                  'exit_code', 'progress', 'priority', 'bandwidth_mbps')
+
+def api_response(state, build):
+    """JSON from build(), or 304 Not Modified if the client's ETag for state is current"""
+    tag = json.dumps([API_EPOCH, request.full_path, state], sort_keys=True, default=str)
+    etag = hashlib.sha1(tag.encode('utf-8')).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def api_error(message, status):
+    return jsonify({'error': message}), status
+
+def api_job(job):
+    return {field: job[field] for field in API_JOB_FIELDS}
+
+def clock_minute():
+    # Upcoming runs are derived from the clock, so they can change without a new revision
+    return datetime.datetime.now().strftime('%Y-%m-%d %H:%M')
+
+def collect_active_jobs():
+    counts = collections.Counter((('platform', j['platform']), ('status', j['status']))
+                                 for j in job_manager.jobs(ACTIVE_JOB_STATUSES))
+    return dict(counts)
+
+metrics.gauge('dashboard_prefill_jobs', 'Running and queued prefill jobs', collect_active_jobs)
+metrics.gauge('dashboard_lancache_cache_bytes', 'Disk space used by the lancache cache directory',
+              cache_usage.collect)
+metrics.gauge('dashboard_config_revision', 'Current config revision',
+              lambda: {(): config_store.revision()})
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Metrics in the Prometheus text format; open to scrapers unless "metrics_require_token" is set"""
+    if config_store.view().get('metrics_require_token') and auth.request_token() is None:
+        return Response('API token required\n', 401, {'WWW-Authenticate': 'Bearer'}, mimetype='text/plain')
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/v1/status')
+@login_required
+def api_status():
+    config = config_store.view()
+    state = [config.get('revision'), job_manager.revision(), clock_minute()]
+    return api_response(state, lambda: {
+        'game_counts': {p: len(config['games'].get(p, [])) for p in PLATFORMS},
+        'active_jobs': get_active_jobs(),
+        'upcoming_schedules': config_store.upcoming_schedules()
+    })
+
+@app.route('/api/v1/jobs')
+@login_required
+def api_jobs():
+    statuses = request.args.get('status')
+    statuses = tuple(statuses.split(',')) if statuses else None
+    return api_response([job_manager.revision()],
+                        lambda: {'jobs': [api_job(j) for j in job_manager.jobs(statuses)]})
+
+@app.route('/api/v1/jobs/<job_id>')
+@login_required
+def api_job_detail(job_id):
+    revision = job_manager.revision()
+    job = job_manager.get(job_id)
+    if job is None:
+        return api_error(f"Unknown job: {job_id}", 404)
+    return api_response([revision], lambda: api_job(job))
+
+@app.route('/api/v1/games')
+@app.route('/api/v1/games/<platform>')
+@login_required
+def api_games(platform=None):
+    if platform is not None and platform not in PLATFORMS:
+        return api_error(f"Invalid platform: {platform}", 404)
+    config = config_store.view()
+    games = config['games']
+    if platform:
+        return api_response([config.get('revision')], lambda: {'games': games.get(platform, [])})
+    return api_response([config.get('revision')], lambda: {'games': {p: games.get(p, []) for p in PLATFORMS}})
+
+@app.route('/api/v1/library/<platform>')
+@login_required
+def api_library(platform):
+    """One page of the game library (q, sort=name|size, order, page), or ?ids=1 for every matching id"""
+    if platform not in PLATFORMS:
+        return api_error(f"Invalid platform: {platform}", 404)
+    index = library_index(platform)
+    config = config_store.view()
+    selected = config_store.game_index(platform)
+    if request.args.get('ids'):
+        def build():
+            sort = request.args.get('sort', 'name')
+            positions = index.search(request.args.get('q', ''), sort, request.args.get('order') == 'desc')
+            return {'ids': [index.games[i]['id'] for i in positions]}
+        return api_response([index.version], build)
+    return api_response([index.version, config.get('revision')],
+                        lambda: query_library(platform, request.args, selected))
+
+@app.route('/api/v1/library/<platform>/changes')
+@login_required
+def api_library_changes(platform):
+    if platform not in PLATFORMS:
+        return api_error(f"Invalid platform: {platform}", 404)
+    since = request.args.get('since')
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+    return api_response([library_snapshots.revision],
+                        lambda: {'changes': library_snapshots.changes(platform, since, limit)})
+
+@app.route('/api/v1/schedules')
+@login_required
+def api_schedules():
+    config = config_store.view()
+
+    def build():
+        now = datetime.datetime.now()
+        schedules = []
+        for sched in config['schedules']:
+            next_run = next_schedule_run(sched, now) if sched.get('enabled') else None
+            schedules.append(dict(sched, next_run=next_run.strftime('%Y-%m-%d %H:%M') if next_run else None))
+        return {'schedules': schedules}
+
+    return api_response([config.get('revision'), clock_minute()], build)
+
+@app.route('/api/v1/logs')
+@login_required
+def api_logs():
+    log_catalog.reconcile()
+    # Sizes of running jobs' logs grow without a catalog change, so job progress counts too
+    state = [log_catalog.revision, job_manager.revision()]
+
+    def build():
+        filters, page, logs, total = list_logs(request.args)
+        return {'logs': logs, 'page': page, 'per_page': LOG_LIST_PAGE_SIZE, 'total': total}
+
+    return api_response(state, build)
+
+@app.route('/api/v1/cache')
+@login_required
+def api_cache():
+    try:
+        hours = min(max(int(request.args.get('hours', 24)), 1), ACCESS_LOG_RETENTION_DAYS * 24)
+    except ValueError:
+        return api_error('hours must be a number', 400)
+
+    def build():
+        return {'hours': hours, 'platforms': access_log.summary(hours), 'depots': access_log.top_depots(hours)}
+
+    return api_response([access_log.revision, clock_minute()], build)
+
+@app.route('/api/v1/storage')
+@login_required
+def api_storage():
+    config = config_store.view()
+    return api_response([cache_usage.revision, library_snapshots.revision, config.get('revision'), clock_minute()],
+                        lambda: {'forecast': cache_usage.forecast(), 'buckets': cache_usage.buckets()})
+
+
+def create_app():
+    """WSGI factory for external servers, e.g. gunicorn -w 1 --threads 8 'app:create_app()'"""
+    start_background_services()
+    return app
+
+
+def serve():
+    """Serve the dashboard with waitress, or the development server if it is not installed"""
+    config = config_store.view()
+    threads = config.get('server_threads', SERVER_THREADS)
+    port = config.get('server_port', SERVER_PORT)
+    start_background_services()
+    try:
+        from waitress import serve as waitress_serve
+    except ImportError:
+        logging.warning("waitress is not installed, falling back to the development server")
+        app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
+        return
+    logging.info(f"Serving on port {port} with {threads} threads")
+    waitress_serve(app, host='0.0.0.0', port=port, threads=threads)
+
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8080, debug=False)
+    serve()
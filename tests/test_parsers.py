@@ -0,0 +1,186 @@
+"""Synthetic logs fed through the access log ingester, the progress parser and the log pager.
+
+Run from the repository root with: python -m unittest discover tests
+"""
+import datetime, gzip, os, sys, tempfile, unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app
+
+
+def access_line(status, size, depot='480', cache='steam'):
+    """One lancache "cachelog" line, stamped now so it falls in the last hour"""
+    now = datetime.datetime.now(datetime.timezone.utc).strftime('%d/%b/%Y:%H:%M:%S +0000')
+    return (f'[{cache}] 10.0.0.5 / - - - [{now}] "GET /depot/{depot}/chunk/0a1b2c HTTP/1.1" 200 '
+            f'{size} "-" "Valve/Steam HTTP Client 1.0" "{status}" "lancache.steamcontent.com" "-"\n')
+
+
+class AccessLogIngesterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.dir.name, 'access.log')
+        self.ingester = app.AccessLogIngester(os.path.join(self.dir.name, 'history.db'))
+        self.ingester.log_path = lambda: self.log
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write(self, text, mode='a'):
+        with open(self.log, mode) as f:
+            f.write(text)
+
+    def totals(self):
+        (row,) = self.ingester.summary(hours=2)
+        return row['hits'], row['misses'], row['hit_bytes'], row['miss_bytes']
+
+    def test_partial_line_waits_for_its_newline(self):
+        last = access_line('MISS', 300)
+        self.write(access_line('HIT', 100) + access_line('HIT', 200) + last[:40])
+        self.assertEqual(self.ingester.run_once(), 2)
+        self.assertEqual(self.totals(), (2, 0, 300, 0))
+
+        self.write(last[40:])
+        self.assertEqual(self.ingester.run_once(), 1)
+        self.assertEqual(self.totals(), (2, 1, 300, 300))
+        self.assertEqual(self.ingester.run_once(), 0)
+
+    def test_rotation_reads_the_rest_of_the_rotated_file_first(self):
+        self.write(access_line('HIT', 100))
+        self.ingester.run_once()
+        # Written after the last pass, then the log is renamed away
+        self.write(access_line('MISS', 200))
+        os.rename(self.log, self.log + '.1')
+        self.write(access_line('HIT', 400), mode='w')
+
+        self.assertEqual(self.ingester.run_once(), 2)
+        self.assertEqual(self.totals(), (2, 1, 500, 200))
+
+    def test_truncated_log_restarts_at_the_beginning(self):
+        self.write(access_line('HIT', 100) + access_line('HIT', 100))
+        self.ingester.run_once()
+        self.write(access_line('MISS', 50), mode='w')
+
+        self.assertEqual(self.ingester.run_once(), 1)
+        self.assertEqual(self.totals(), (2, 1, 200, 50))
+
+    def test_steam_lines_are_counted_per_depot(self):
+        self.write(access_line('HIT', 100, depot='480') + access_line('MISS', 100, depot='731')
+                   + access_line('HIT', 100, depot='480') + 'not a cachelog line\n')
+        self.assertEqual(self.ingester.run_once(), 4)
+        depots = {row['depot']: (row['hits'], row['misses']) for row in self.ingester.top_depots(hours=2)}
+        self.assertEqual(depots, {'480': (2, 0), '731': (0, 1)})
+
+
+class ProgressParserTest(unittest.TestCase):
+
+    OUTPUT = ('Starting Half-Life\n'
+              'Downloading 2.00 GB\n'
+              '1.00 GB / 2.00 GB\n'
+              'Finished in 01:40 - 160.00 Mbit/s\n'
+              'Starting Portal\n'
+              'Portal is up to date\n'
+              'Starting Dota 2\n'
+              'Unable to download Dota 2\n'
+              'Starting Team Fortress 2\n'
+              '0.50 GB / 4.00 GB\n')
+
+    def test_lines_split_across_feeds_give_the_same_result(self):
+        whole = app.ProgressParser()
+        whole.feed(self.OUTPUT)
+        pieces = app.ProgressParser()
+        for i in range(0, len(self.OUTPUT), 7):
+            pieces.feed(self.OUTPUT[i:i + 7])
+        self.assertEqual(pieces.apps, whole.apps)
+        self.assertEqual(pieces.summary(), whole.summary())
+
+    def test_outcomes_bytes_and_current_app(self):
+        parser = app.ProgressParser()
+        parser.feed(self.OUTPUT)
+        self.assertEqual({name: a['status'] for name, a in parser.apps.items()},
+                         {'Half-Life': 'downloaded', 'Portal': 'up_to_date', 'Dota 2': 'failed',
+                          'Team Fortress 2': 'downloading'})
+        self.assertEqual(parser.apps['Half-Life']['bytes'], 2 * 1000 ** 3)
+        self.assertEqual(parser.apps['Half-Life']['duration'], 100)
+        summary = parser.summary()
+        self.assertEqual(summary['current_app'], 'Team Fortress 2')
+        self.assertEqual(summary['bytes_downloaded'], 2 * 1000 ** 3 + 500 * 1000 ** 2)
+        self.assertEqual(summary['rate'], 20 * 1000 ** 2)
+        self.assertEqual((summary['apps_downloaded'], summary['apps_up_to_date'], summary['apps_failed']), (1, 1, 1))
+
+    def test_last_line_without_newline_is_held_back(self):
+        parser = app.ProgressParser()
+        self.assertTrue(parser.feed('Starting Portal\nPortal is up to'))
+        self.assertEqual(parser.apps['Portal']['status'], 'checking')
+        parser.feed(' date')
+        self.assertEqual(parser.apps['Portal']['status'], 'checking')
+        parser.feed('\n')
+        self.assertEqual(parser.apps['Portal']['status'], 'up_to_date')
+
+
+class LogPageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        # Lines of varying length, and a last line without a newline
+        self.content = ''.join(f"line {i} {'x' * (i % 17)}\n" for i in range(1000)) + 'unterminated'
+        self.plain = os.path.join(self.dir.name, 'steam_1.log')
+        with open(self.plain, 'w') as f:
+            f.write(self.content)
+        self.compressed = self.plain + '.gz'
+        with gzip.open(self.compressed, 'wt') as f:
+            f.write(self.content)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def forward(self, path, lines):
+        pages, start = [], 0
+        while True:
+            page = app.read_log_page(path, start=start, lines=lines)
+            if page['end'] == start:
+                return pages
+            self.assertEqual(page['start'], start)
+            pages.append(page)
+            start = page['end']
+
+    def backward(self, path, lines):
+        pages, end = [], None
+        while end != 0:
+            page = app.read_log_page(path, end=end, lines=lines)
+            if end is not None:
+                self.assertEqual(page['end'], end)
+            pages.append(page)
+            end = page['start']
+        return pages
+
+    def test_forward_pages_join_up(self):
+        for path in (self.plain, self.compressed):
+            pages = self.forward(path, 64)
+            self.assertEqual(''.join(p['text'] for p in pages), self.content, path)
+            self.assertTrue(all(p['text'].endswith('\n') for p in pages[:-1]), path)
+            self.assertEqual(pages[0]['text'].count('\n'), 64, path)
+
+    def test_backward_pages_join_up_from_the_tail(self):
+        for path in (self.plain, self.compressed):
+            pages = self.backward(path, 64)
+            self.assertTrue(pages[0]['text'].endswith('unterminated'), path)
+            self.assertEqual(pages[0]['end'], len(self.content), path)
+            self.assertEqual(''.join(p['text'] for p in reversed(pages)), self.content, path)
+            self.assertTrue(all(p['text'].endswith('\n') for p in pages[1:]), path)
+
+    def test_compressed_pages_have_the_same_offsets(self):
+        for lines in (1, 64, 5000):
+            self.assertEqual([(p['start'], p['end']) for p in self.forward(self.compressed, lines)],
+                             [(p['start'], p['end']) for p in self.forward(self.plain, lines)])
+            self.assertEqual([(p['start'], p['end']) for p in self.backward(self.compressed, lines)],
+                             [(p['start'], p['end']) for p in self.backward(self.plain, lines)])
+
+    def test_empty_log(self):
+        empty = os.path.join(self.dir.name, 'epic_1.log')
+        open(empty, 'w').close()
+        self.assertEqual(app.read_log_page(empty), {'text': '', 'start': 0, 'end': 0, 'size': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()